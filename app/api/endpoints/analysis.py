@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Dict, List, Optional
 
 from fastapi import Depends, HTTPException
 import requests
@@ -817,10 +817,10 @@ def generate_subscriber_id(symbol: str, resolution: str) -> str:
 
 def _get_token_market_info(symbol: str) -> schemas.TokenMarketInfo:
     """Get complete token market info by combining cached info and price data"""
-    # Get info from cache or DB (checks cache first)
-    info = price_cache.get_token_info(symbol)
-    # Get price from cache or DB (checks cache first)
-    price = price_cache.get_token_price(symbol)
+    # Get info and price from cache or DB (checks cache first)
+    infos, prices = price_cache.get_token_market_data([symbol])
+    info = infos.get(symbol.strip())
+    price = prices.get(symbol.strip())
 
     if info and price:
         # Calculate market cap
@@ -869,16 +869,7 @@ def _get_tokens_bulk(symbols: List[str]) -> List[schemas.TokenMarketInfo]:
 
     # Get info and prices from cache or DB in single pass
     # Cache manager automatically fetches from DB if not cached
-    info_dict: Dict[str, Any] = {}
-    price_dict: Dict[str, Any] = {}
-
-    for symbol in all_symbols:
-        info = price_cache.get_token_info(symbol)
-        price = price_cache.get_token_price(symbol)
-        if info:
-            info_dict[symbol] = info
-        if price:
-            price_dict[symbol] = price
+    info_dict, price_dict = price_cache.get_token_market_data(all_symbols)
 
     # Combine info and price data, build result dict
     result_dict: Dict[str, schemas.TokenMarketInfo] = {}
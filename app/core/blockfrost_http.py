@@ -0,0 +1,83 @@
+"""Connection pooling for the Blockfrost SDK.
+
+blockfrost-python 0.6.0 has no session hook: every endpoint module calls the
+module-level ``requests.get``/``requests.post``, so each call opens a new TCP+TLS
+connection. ``setup_blockfrost_http()`` imports all of the SDK's modules and
+rebinds their ``requests`` name to one shared keep-alive Session. It is called
+once from the app lifespan, before any request is served. The rebinding relies
+on SDK internals, so setup refuses to run against any other SDK version (the
+dependency is pinned to match in pyproject.toml).
+"""
+
+import importlib
+import importlib.metadata
+import pkgutil
+from typing import List, Optional
+
+import blockfrost
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SUPPORTED_BLOCKFROST_VERSION = "0.6.0"
+
+# SDK modules the app calls into; setup fails loudly if any of them is missed
+REQUIRED_MODULES = (
+    "blockfrost.api",
+    "blockfrost.api.cardano.addresses",
+    "blockfrost.api.cardano.blocks",
+    "blockfrost.api.cardano.epochs",
+    "blockfrost.api.cardano.ledger",
+    "blockfrost.api.cardano.scripts",
+    "blockfrost.api.cardano.transactions",
+    "blockfrost.api.cardano.utils",
+)
+
+_session: Optional[requests.Session] = None
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    # Retry's default allowed_methods exclude POST, so tx submits are never resent
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.2),
+        ),
+    )
+    return session
+
+
+def setup_blockfrost_http() -> List[str]:
+    """Point every Blockfrost SDK module at the shared session.
+
+    Every submodule is imported here, so none can keep the plain ``requests``
+    module by being imported later. Returns the names of the pooled modules.
+    """
+    global _session
+    version = importlib.metadata.version("blockfrost-python")
+    if version != SUPPORTED_BLOCKFROST_VERSION:
+        raise RuntimeError(
+            f"Blockfrost HTTP pooling supports blockfrost-python "
+            f"{SUPPORTED_BLOCKFROST_VERSION}, found {version}"
+        )
+    if _session is None:
+        _session = _new_session()
+
+    pooled = []
+    prefix = blockfrost.__name__ + "."
+    for info in pkgutil.walk_packages(blockfrost.__path__, prefix):
+        module = importlib.import_module(info.name)
+        if getattr(module, "requests", None) is requests:
+            # Not a declared module attribute, just the SDK's own
+            # `import requests`; a Session has the same get/post API
+            setattr(module, "requests", _session)  # noqa: B010
+        if getattr(module, "requests", None) is _session:
+            pooled.append(info.name)
+
+    missing = [name for name in REQUIRED_MODULES if name not in pooled]
+    if missing:
+        raise RuntimeError(f"Blockfrost HTTP pooling missed: {', '.join(missing)}")
+    return pooled
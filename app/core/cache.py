@@ -5,6 +5,7 @@ import hashlib
 import inspect
 import json
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from functools import wraps
 from threading import Lock
@@ -324,6 +325,77 @@ class HybridCacheManager:
 cache_manager = HybridCacheManager()
 
 
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe in-memory LRU cache whose entries expire after a fixed TTL
+
+    Expired entries stay in place until overwritten or pushed out by the LRU
+    bound, so callers can fall back to them with get_stale() when a refresh fails.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def get_stale(self, key: Any, default: Any = None) -> Any:
+        """Return the cached value even if it has expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            return default if entry is None else entry[0]
+
+    def _set(self, key: Any, value: Any, expires_at: float) -> None:
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._set(key, value, time.monotonic() + self.ttl)
+
+    def update(self, items: Dict[Any, Any]) -> None:
+        with self._lock:
+            expires_at = time.monotonic() + self.ttl
+            for key, value in items.items():
+                self._set(key, value, expires_at)
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def keys(self) -> list:
+        """Return the keys of entries that have not expired"""
+        now = time.monotonic()
+        with self._lock:
+            return [k for k, (_, exp) in self._data.items() if exp > now]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
 def _make_cache_key(func_name: str, args: tuple, kwargs: dict) -> str:
     """Generate cache key from function name and arguments"""
     # Convert args and kwargs to a stable string representation
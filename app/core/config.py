@@ -55,12 +55,19 @@ class Settings(BaseSettings):
     BLOCKFROST_API_KEY: str
     CARDANO_NETWORK: Network = Network.MAINNET
     VAULT_WALLETS_PATH: str | None = None
+    # Poll the chain tip every 10s so vault withdraws skip that Blockfrost call
+    CHAIN_STATE_ENABLE_BACKGROUND_REFRESH: bool = False
+
+    # Vault deposit queue settings
+    VAULT_DEPOSIT_WORKER_COUNT: int = 8
+    VAULT_DEPOSIT_QUEUE_MAX: int = 500  # pending deposits before new ones are rejected
 
     # Token price cache settings
     TOKEN_CACHE_ENABLE_BACKGROUND_REFRESH: bool = False
     TOKEN_CACHE_REFRESH_INTERVAL: int = 15  # seconds
     TOKEN_CACHE_INFO_TTL: int = 3600  # 1 hour in seconds
     TOKEN_CACHE_PRICE_TTL: int = 30  # 30 seconds
+    TOKEN_CACHE_MAX_SIZE: int = 10_000  # entries per cache
 
     @field_validator("CARDANO_NETWORK", mode="before")
     @classmethod
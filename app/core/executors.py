@@ -0,0 +1,19 @@
+"""Thread pools shared by every service that does blocking I/O.
+
+There is one pool per backend, so the sizes below cap concurrent Blockfrost and
+DB work app-wide instead of per module. Code running on one of these pools must
+not block on another task submitted to the same pool.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+# Blockfrost SDK calls, plus the Minswap lookups made while resolving a swap
+BLOCKFROST_POOL_SIZE = 12
+# Kept under the request engine's pool_size (10) so pool threads never wait
+# on each other for a connection
+DB_POOL_SIZE = 8
+
+blockfrost_pool = ThreadPoolExecutor(
+    max_workers=BLOCKFROST_POOL_SIZE, thread_name_prefix="blockfrost"
+)
+db_pool = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
@@ -0,0 +1,46 @@
+"""Non-blocking logging for the app package.
+
+Records from ``app.*`` loggers are put on an in-memory queue by a QueueHandler and
+written to stdout by a QueueListener thread, so code on the event loop never blocks
+on the stream write.
+"""
+
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import settings
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging() -> None:
+    """Attach the queue handler to the ``app`` logger and start the writer thread."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    app_logger = logging.getLogger("app")
+    app_logger.addHandler(QueueHandler(log_queue))
+    app_logger.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
+    app_logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
@@ -19,6 +19,20 @@ engine = create_engine(
 # Create a configured "Session" class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Small separate pool for background jobs so they never take connections
+# the request path could use
+background_engine = create_engine(
+    settings.DATABASE_URL,
+    pool_size=2,
+    max_overflow=0,
+    connect_args={"connect_timeout": 30},
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+BackgroundSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=background_engine
+)
+
 
 # do not change the order of the code below
 # Dependency that can be used in routes to get the session
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -13,6 +14,12 @@ def load_contract_script(contract_name: Optional[str]) -> PlutusV3Script:
     name = (contract_name or "").strip()
     if not name:
         name = DEFAULT_CONTRACT_NAME
+    return _load_script(name)
+
+
+@lru_cache(maxsize=16)
+def _load_script(name: str) -> PlutusV3Script:
+    """Read and decode a contract's script once; scripts never change on disk."""
     path = CONTRACTS_ROOT / name / "script.cbor"
     if not path.exists():
         raise FileNotFoundError(f"Contract script not found: {path}")
@@ -1,46 +1,94 @@
 # pyright: reportAttributeAccessIssue=false
 
 import asyncio
+import random
+import threading
 import time
 import json
+from collections import Counter, OrderedDict, defaultdict
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Callable, Iterable, Optional, Tuple, TypeVar
 
 from psycopg2 import IntegrityError
 import requests
 from blockfrost.utils import Namespace
+from requests.adapters import HTTPAdapter
 from pycardano import (
     BlockFrostChainContext,
     Network,
 )
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.executors import blockfrost_pool, db_pool
 from app.db.session import SessionLocal
 from app.models.swaps import Swap
 
+T = TypeVar("T")
+
 BLOCKFROST_ENDPOINTS = {
     Network.MAINNET: "https://cardano-mainnet.blockfrost.io/api/",
     Network.TESTNET: "https://cardano-preprod.blockfrost.io/api/",
 }
-context = BlockFrostChainContext(
-    project_id=settings.BLOCKFROST_API_KEY,
-    base_url=BLOCKFROST_ENDPOINTS.get(
-        settings.CARDANO_NETWORK,
-        BLOCKFROST_ENDPOINTS[Network.MAINNET],
-    ),
-)
+
+
+def new_chain_context() -> BlockFrostChainContext:
+    """Build a Blockfrost chain context for the configured network."""
+    return BlockFrostChainContext(
+        project_id=settings.BLOCKFROST_API_KEY,
+        base_url=BLOCKFROST_ENDPOINTS.get(
+            settings.CARDANO_NETWORK,
+            BLOCKFROST_ENDPOINTS[Network.MAINNET],
+        ),
+    )
+
+
+context = new_chain_context()
+
+# Shared keep-alive session for Minswap aggregator calls
+MINSWAP_HTTP_TIMEOUT_SECONDS = 10
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
+
+# Minswap asset metadata by unit: (expires_at monotonic, {ticker, price_by_ada})
+SWAP_ASSET_CACHE_TTL_SECONDS = 300
+_asset_cache: dict[str, tuple[float, dict]] = {}
+
+# Minswap ADA/USD price: (expires_at monotonic, price)
+SWAP_ADA_PRICE_TTL_SECONDS = 30
+_ada_price: tuple[float, float] | None = None
+_ada_price_lock = threading.Lock()
 
 MINSWAP_V2_POOL_CONTRACT = "addr1z84q0denmyep98ph3tmzwsmw0j7zau9ljmsqx6a4rvaau66j2c79gy9l76sdg0xwhd7r0c0kna0tycz4y5s6mlenh8pq777e2a"
 
 # Swap async queue worker config
 SWAP_RETRY_MAX_AGE_SECONDS = 120
-SWAP_RETRY_SLEEP_SECONDS = 15
+SWAP_RETRY_BASE_SECONDS = 2  # backoff: 2s, 4s, 8s, ... plus up to 1s jitter
+SWAP_RETRY_MAX_DELAY_SECONDS = 60
 SWAP_WARN_THRESHOLD = 20
-swap_queue: asyncio.Queue[tuple[str, float, Optional[str]]] = (
-    asyncio.Queue()
-)  # (order_tx_id, received_at, user)
-swap_worker_task: asyncio.Task | None = None
-swap_queue_tx_ids: set[str] = set()  # Track tx_ids in queue to avoid duplicates
+SWAP_COMPLETED_CACHE_SIZE = 10_000
+SWAP_QUEUE_MAX_SIZE = 10_000  # put() waits when full (backpressure)
+SWAP_TRACKED_MAX_SIZE = 20_000  # queued + retrying tx_ids
+SWAP_PERSIST_BATCH_SIZE = 100
+SWAP_PERSIST_FLUSH_SECONDS = 0.1
+SWAP_WORKER_COUNT = 8
+SWAP_WORKER_IDLE_SECONDS = 30
+SWAP_API_CONCURRENCY = 4  # concurrent Blockfrost/Minswap lookups across workers
+swap_queue: asyncio.Queue[tuple[str, float, Optional[str], int]] = (
+    asyncio.Queue(maxsize=SWAP_QUEUE_MAX_SIZE)
+)  # (order_tx_id, received_at, user, attempt)
+swap_worker_tasks: list[asyncio.Task] = []
+# Track tx_ids in queue (or waiting for a retry) to avoid duplicates; oldest first
+swap_queue_tx_ids: OrderedDict[str, None] = OrderedDict()
+# Recently completed tx_ids (LRU), lets duplicate enqueues skip the DB check
+_completed_cache: OrderedDict[str, None] = OrderedDict()
+# Pending row values waiting for the batched writer
+_persist_queue: asyncio.Queue[dict] = asyncio.Queue()
+_persist_flusher_task: asyncio.Task | None = None
+_swap_api_semaphore = asyncio.Semaphore(SWAP_API_CONCURRENCY)
+_swap_retry_tasks: set[asyncio.Task] = set()  # strong refs to pending requeues
 
 
 @dataclass
@@ -50,44 +98,54 @@ class VaultWithdrawChainResult:
     new_config_index: int
 
 
+def _run_api(func: Callable[..., T], *args) -> asyncio.Future[T]:
+    """Run a blocking Blockfrost/Minswap call on the dedicated API pool."""
+    return asyncio.get_running_loop().run_in_executor(blockfrost_pool, func, *args)
+
+
 # not use
-def sum_utxos_amount(utxos: list[Namespace], only: list[str] = []) -> dict:
-    total = {}
+def sum_utxos_amount(
+    utxos: list[Namespace], only: Optional[Iterable[str]] = None
+) -> dict:
+    total: defaultdict[str, defaultdict[str, int]] = defaultdict(
+        lambda: defaultdict(int)
+    )
+    addresses = frozenset(only) if only else None
     try:
         for u in utxos:
-            if len(only) == 0 or u.address in only:
-                d = total.get(u.address, {})
+            if addresses is None or u.address in addresses:
+                d = total[u.address]
                 for t in u.amount:
-                    d[t.unit] = float(d.get(t.unit, 0)) + float(t.quantity)
-                total[u.address] = d
+                    # on-chain quantities are integer strings (lovelace / token units)
+                    d[t.unit] += int(t.quantity)
     except Exception as e:
         raise ValueError(f"Failed to sum UTXOs: {str(e)}")
-    return total
+    return {addr: dict(amount) for addr, amount in total.items()}
 
 
 # not use
 def get_change_amount_utxo(
-    utxo_inputs: list[Namespace], utxo_outputs: list[Namespace], only: list[str] = []
+    utxo_inputs: list[Namespace],
+    utxo_outputs: list[Namespace],
+    only: Optional[Iterable[str]] = None,
 ) -> dict:
+    """Per-address output minus input amounts, dropping units with no change."""
     total_in = sum_utxos_amount(utxo_inputs, only)
     total_out = sum_utxos_amount(utxo_outputs, only)
-    # change = {}
-    for addr, amount in total_in.items():
-        addr_out = total_out.get(addr, {})
-        for t, v in amount.items():
-            amount_change = addr_out.get(t, 0) - v
-            if amount_change == 0:
-                addr_out.pop(t)
-            else:
-                addr_out[t] = amount_change
-        if len(addr_out.keys()) == 0:
-            total_out.pop(addr)
-    change = total_out
+    change = {}
+    for addr in total_in.keys() | total_out.keys():
+        delta = Counter(total_out.get(addr, {}))
+        delta.subtract(total_in.get(addr, {}))  # keeps negative deltas
+        amount = {t: v for t, v in delta.items() if v != 0}
+        if amount:
+            change[addr] = amount
     return change
 
 
 # not use
-def get_change_amount(tx_list: list[str], only: list[str] = []) -> dict:
+def get_change_amount(
+    tx_list: list[str], only: Optional[Iterable[str]] = None
+) -> dict:
     global context
     utxo_inputs = []
     utxo_outputs = []
@@ -105,7 +163,7 @@ def get_executed_tx(
     """"""
     url = "https://agg-api.minswap.org/aggregator/trading-histories"
     body = {"owner_address": user, "token_b": token_out, "token_a": token_in}
-    response = requests.post(url, json=body)
+    response = _http.post(url, json=body, timeout=MINSWAP_HTTP_TIMEOUT_SECONDS)
     if response.status_code != 200:
         raise Exception(
             f"Failed to get executed tx: {response.status_code} {response.text}"
@@ -177,14 +235,45 @@ def extract_swap_info_v0(
     }
 
 
+def _asset_meta(asset: dict) -> dict:
+    """Ticker and price_by_ada of a Minswap asset, filling missing fields from cache."""
+    unit = asset.get("token_id") or ""
+    now = time.monotonic()
+    cached = _asset_cache.get(unit)
+    cached_meta = cached[1] if cached and cached[0] > now else {}
+    ticker = asset.get("ticker") or cached_meta.get("ticker")
+    price_by_ada = asset.get("price_by_ada")
+    if price_by_ada is None:
+        price_by_ada = cached_meta.get("price_by_ada", 1)
+    meta = {"ticker": ticker, "price_by_ada": price_by_ada}
+    if unit and asset.get("ticker") and asset.get("price_by_ada") is not None:
+        _asset_cache[unit] = (now + SWAP_ASSET_CACHE_TTL_SECONDS, meta)
+    return meta
+
+
+def _get_ada_price_usd() -> float:
+    """Minswap ADA/USD price, shared by all workers for SWAP_ADA_PRICE_TTL_SECONDS.
+    Concurrent callers wait on the lock for the single in-flight request."""
+    global _ada_price
+    with _ada_price_lock:
+        now = time.monotonic()
+        if _ada_price is not None and _ada_price[0] > now:
+            return _ada_price[1]
+        price_res = _http.get(
+            "https://agg-api.minswap.org/aggregator/ada-price?currency=usd",
+            timeout=MINSWAP_HTTP_TIMEOUT_SECONDS,
+        )
+        price = float(price_res.json().get("value", {"price": 1}).get("price", 1))
+        _ada_price = (now + SWAP_ADA_PRICE_TTL_SECONDS, price)
+        return price
+
+
 # todo: have bug when user (not None or invalid) and tx not match
 def extract_swap_info(market_order_tx: str, user: Optional[str] = None) -> dict:
-    price_res = requests.get(
-        "https://agg-api.minswap.org/aggregator/ada-price?currency=usd"
-    )
-    price_ada = float(price_res.json().get("value", {"price": 1}).get("price", 1))
     if user is None:
         mo_utxos = context.api.transaction_utxos(market_order_tx)
+        if not mo_utxos.inputs:
+            raise Exception(f"Order tx has no inputs: {market_order_tx}")
         user = mo_utxos.inputs[0].address
 
     url = "https://agg-api.minswap.org/aggregator/orders"
@@ -194,18 +283,15 @@ def extract_swap_info(market_order_tx: str, user: Optional[str] = None) -> dict:
         "amount_in_decimal": True,
         "tx_id": market_order_tx,
     }
-    response = requests.post(url, json=body)
+    response = _http.post(url, json=body, timeout=MINSWAP_HTTP_TIMEOUT_SECONDS)
     if response.status_code != 200:
         raise Exception(
             f"Failed to get executed tx: {response.status_code} {response.text}"
         )
-    data = response.json()
-    if len(data.get("orders", [])) == 0:
-        raise Exception(f"Order not found: {market_order_tx}")
-    order = data.get("orders", [])
-    if len(order) == 0:
+    orders = response.json().get("orders") or []
+    if len(orders) == 0:
         raise Exception(f"Order not found: {market_order_tx}")
-    order = order[0]
+    order = orders[0]
     detail = order.get("details", {})
     amount_in = float(detail.get("input_amount", 0))
     amount_out = float(detail.get("executed_amount", 0))
@@ -216,16 +302,19 @@ def extract_swap_info(market_order_tx: str, user: Optional[str] = None) -> dict:
         float(order.get("batcher_fee", 0)) + float(detail.get("trading_fee", 0)), 6
     )  # not all the fee
 
-    asset_a = order.get("asset_a", {})
-    asset_b = order.get("asset_b", {})
+    # Only fetched once the order is known to be executed; retries skip it
+    price_ada = _get_ada_price_usd()
+
+    asset_a = _asset_meta(order.get("asset_a", {}))
+    asset_b = _asset_meta(order.get("asset_b", {}))
     if detail.get("direction", "") == "A_TO_B":
-        token_in = asset_a.get("ticker")
-        token_out = asset_b.get("ticker")
-        value_ada = asset_a.get("price_by_ada", 1) * amount_in
+        token_in = asset_a["ticker"]
+        token_out = asset_b["ticker"]
+        value_ada = asset_a["price_by_ada"] * amount_in
     else:
-        token_in = asset_b.get("ticker")
-        token_out = asset_a.get("ticker")
-        value_ada = asset_b.get("price_by_ada", 1) * amount_in
+        token_in = asset_b["ticker"]
+        token_out = asset_a["ticker"]
+        value_ada = asset_b["price_by_ada"] * amount_in
     return {
         "transaction_id": market_order_tx,
         "execution_tx_id": order.get("updated_tx_id", ""),
@@ -241,115 +330,231 @@ def extract_swap_info(market_order_tx: str, user: Optional[str] = None) -> dict:
     }
 
 
+def _track_swap(order_tx_id: str) -> None:
+    """Mark a tx_id as queued, evicting the oldest entry when the cap is hit."""
+    swap_queue_tx_ids[order_tx_id] = None
+    if len(swap_queue_tx_ids) > SWAP_TRACKED_MAX_SIZE:
+        evicted, _ = swap_queue_tx_ids.popitem(last=False)
+        print(
+            f"[swap-queue] warning: tracking set over {SWAP_TRACKED_MAX_SIZE}, evicted {evicted}"
+        )
+
+
+def _remember_completed(order_tx_id: str) -> None:
+    """Record a completed tx_id, evicting the oldest entry when the cache is full."""
+    _completed_cache[order_tx_id] = None
+    _completed_cache.move_to_end(order_tx_id)
+    if len(_completed_cache) > SWAP_COMPLETED_CACHE_SIZE:
+        _completed_cache.popitem(last=False)
+
+
 async def add_swap_to_queue(order_tx_id: str, user: Optional[str] = None) -> None:
     """Add a swap order tx ID to the processing queue."""
-    global swap_queue, swap_worker_task, swap_queue_tx_ids
-
     # Check if tx_id already exists in queue
     if order_tx_id in swap_queue_tx_ids:
         print(f"[swap-queue] skip: {order_tx_id} already in queue")
         return
 
+    if order_tx_id in _completed_cache:
+        print(f"[swap-queue] skip: {order_tx_id} already completed")
+        return
+
     # Check if already completed in DB
     def _check_db():
         db = SessionLocal()
         try:
-            existing = db.query(Swap).filter(Swap.transaction_id == order_tx_id).first()
-            if existing and existing.status == "completed":
-                return True
-            return False
+            stmt = (
+                select(1)
+                .where(
+                    Swap.transaction_id == order_tx_id, Swap.status == "completed"
+                )
+                .limit(1)
+            )
+            return db.execute(stmt).scalar() is not None
         finally:
             db.close()
 
-    loop = asyncio.get_running_loop()
-    is_completed = await loop.run_in_executor(None, _check_db)
-    if is_completed:
-        print(f"[swap-queue] skip: {order_tx_id} already completed in DB")
-        return
+    # Claim the tx_id before the first await so concurrent calls cannot both enqueue it
+    _track_swap(order_tx_id)
 
-    # Add to queue tracking set
-    swap_queue_tx_ids.add(order_tx_id)
+    try:
+        loop = asyncio.get_running_loop()
+        is_completed = await loop.run_in_executor(db_pool, _check_db)
+        if is_completed:
+            swap_queue_tx_ids.pop(order_tx_id, None)
+            _remember_completed(order_tx_id)
+            print(f"[swap-queue] skip: {order_tx_id} already completed in DB")
+            return
 
-    # Write to DB with status pending
-    current_timestamp = int(time.time())
-    if user is None:
-        try:
-            mo_utxos = context.api.transaction_utxos(order_tx_id)
-            user = mo_utxos.inputs[0].address
-        except Exception as e:
-            print(f"[swap-queue] error getting user: {e}")
-    pending_swap_info = {
-        "transaction_id": order_tx_id,
-        "execution_tx_id": "",
-        "user": user or "",
-        "token_in": "",
-        "amount_in": 0,
-        "token_out": "",
-        "amount_out": 0,
-        "price": 0,
-        "value_ada": 0,
-        "fee": 0,
-        "price_ada": 0,
-        "timestamp": current_timestamp,
-    }
-    await _persist_swap(pending_swap_info, status="pending")
+        # Write to DB with status pending; an unknown user is resolved by the worker
+        # (extract_swap_info) and filled in on the completed row
+        received_at = time.time()
+        current_timestamp = int(received_at)
+        pending_swap_info = {
+            "transaction_id": order_tx_id,
+            "execution_tx_id": "",
+            "user": user or "",
+            "token_in": "",
+            "amount_in": 0,
+            "token_out": "",
+            "amount_out": 0,
+            "price": 0,
+            "value_ada": 0,
+            "fee": 0,
+            "price_ada": 0,
+            "timestamp": current_timestamp,
+        }
+        await _enqueue_persist(pending_swap_info)
+
+        # Add to queue
+        await swap_queue.put((order_tx_id, received_at, user, 0))
+    except BaseException:
+        # Release the claim (including on cancellation) so the tx can be resubmitted
+        swap_queue_tx_ids.pop(order_tx_id, None)
+        raise
 
-    # Add to queue
-    await swap_queue.put((order_tx_id, time.time(), user))
     queue_size = swap_queue.qsize()
     if queue_size >= SWAP_WARN_THRESHOLD:
         print(f"[swap-queue] warning: queue size {queue_size} exceeds threshold")
     await _ensure_swap_worker()
 
 
-async def _persist_swap(swap_info: dict, status: str = "completed") -> None:
-    """Write a swap row to DB in a thread to avoid blocking the event loop."""
+# json.dumps output of a row with no execution tx yet (pending / failed)
+_NO_EXECUTION_EXTEND_DATA = '{"order_tx_id": %s, "execution_tx_id": ""}'
+
+
+def _extend_data_json(order_tx_id: str, execution_tx_id: str) -> str:
+    if not execution_tx_id:
+        return _NO_EXECUTION_EXTEND_DATA % json.dumps(order_tx_id)
+    return json.dumps(
+        {"order_tx_id": order_tx_id, "execution_tx_id": execution_tx_id}
+    )
+
+
+def _swap_row_values(swap_info: dict, status: str) -> dict:
+    values = {
+        "transaction_id": swap_info.get("transaction_id"),
+        "wallet_address": swap_info.get("user"),
+        "from_token": swap_info.get("token_in"),
+        "from_amount": swap_info.get("amount_in"),
+        "to_token": swap_info.get("token_out"),
+        "to_amount": swap_info.get("amount_out"),
+        "price": swap_info.get("price"),
+        "value_ada": swap_info.get("value_ada"),
+        "timestamp": swap_info.get("timestamp"),
+        "fee": swap_info.get("fee"),
+        "price_ada": swap_info.get("price_ada"),
+        "extend_data": _extend_data_json(
+            swap_info.get("transaction_id", ""), swap_info.get("execution_tx_id", "")
+        ),
+        "status": status,
+    }
+    return {k: v for k, v in values.items() if v is not None}
+
+
+def _upsert_swaps(db: Session, rows: list[dict], keep_completed: bool = False) -> None:
+    """INSERT ... ON CONFLICT (transaction_id) DO UPDATE in a single round-trip.
+    With keep_completed, rows already marked completed are left untouched."""
+    stmt = insert(Swap).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Swap.transaction_id],
+        set_={k: stmt.excluded[k] for k in rows[0] if k != "transaction_id"},
+        where=(Swap.status != "completed") if keep_completed else None,
+    )
+    db.execute(stmt)
+
+
+async def _persist_swap(
+    db: Session, swap_info: dict, status: str = "completed"
+) -> None:
+    """Write a swap row to DB in a thread to avoid blocking the event loop.
+    *db* is the calling worker's session; each row is its own transaction."""
     if status not in ["pending", "completed", "failed"]:
         status = "pending"
+    # Build the row on the event loop so the executor thread only does I/O
+    row = _swap_row_values(swap_info, status)
 
     def _write():
-        db = SessionLocal()
         try:
-            row = Swap(
-                transaction_id=swap_info.get("transaction_id"),
-                wallet_address=swap_info.get("user"),
-                from_token=swap_info.get("token_in"),
-                from_amount=swap_info.get("amount_in"),
-                to_token=swap_info.get("token_out"),
-                to_amount=swap_info.get("amount_out"),
-                price=swap_info.get("price"),
-                value_ada=swap_info.get("value_ada"),
-                timestamp=swap_info.get("timestamp"),
-                fee=swap_info.get("fee"),
-                price_ada=swap_info.get("price_ada"),
-                extend_data=json.dumps(
-                    {
-                        "order_tx_id": swap_info.get("transaction_id", ""),
-                        "execution_tx_id": swap_info.get("execution_tx_id", ""),
-                    }
-                ),
-                status=status,
-            )
-
-            db.merge(row)  # on conflict, update existing row
+            _upsert_swaps(db, [row])
             db.commit()
-        finally:
-            db.close()
+        except Exception:
+            db.rollback()
+            raise
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_pool, _write)
+
+
+async def _enqueue_persist(swap_info: dict) -> None:
+    """Queue a pending swap row for the batched writer."""
+    global _persist_flusher_task
+    await _persist_queue.put(_swap_row_values(swap_info, "pending"))
+    if _persist_flusher_task is None or _persist_flusher_task.done():
+        _persist_flusher_task = asyncio.create_task(_persist_flusher())
 
+
+def _write_pending_batch(batch: list[dict]) -> None:
+    db = SessionLocal()
+    try:
+        # The worker may already have completed a swap before its pending row lands
+        try:
+            _upsert_swaps(db, batch, keep_completed=True)
+            db.commit()
+            return
+        except Exception as e:
+            db.rollback()
+            print(f"[swap-queue] error writing {len(batch)} pending rows, retrying one by one: {e}")
+        # One bad row must not cost the rest of the batch their pending rows
+        for row in batch:
+            try:
+                _upsert_swaps(db, [row], keep_completed=True)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"[swap-queue] error writing pending row {row['transaction_id']}: {e}")
+    finally:
+        db.close()
+
+
+async def _persist_flusher():
+    """Write queued pending rows in batches until the queue is empty, then stop."""
+    global _persist_flusher_task
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, _write)
+    while True:
+        try:
+            first = _persist_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            _persist_flusher_task = None
+            return
+
+        # Debounce so rows arriving in a burst share one commit
+        await asyncio.sleep(SWAP_PERSIST_FLUSH_SECONDS)
+        batch = [first]
+        while len(batch) < SWAP_PERSIST_BATCH_SIZE:
+            try:
+                batch.append(_persist_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+        try:
+            await loop.run_in_executor(db_pool, _write_pending_batch, batch)
+        except Exception as e:
+            print(f"[swap-queue] error writing {len(batch)} pending rows: {e}")
 
 
 async def _process_swap_item(
-    order_tx_id: str, received_at: float, user: Optional[str] = None
+    db: Session, order_tx_id: str, received_at: float, user: Optional[str] = None
 ) -> bool:
     """Process a single swap; return True on success, False to trigger retry."""
-    loop = asyncio.get_running_loop()
     try:
-        swap_info = await loop.run_in_executor(
-            None, extract_swap_info, order_tx_id, user
-        )
-        await _persist_swap(swap_info, status="completed")
+        async with _swap_api_semaphore:
+            swap_info = await _run_api(extract_swap_info, order_tx_id, user)
+        # The batched pending write may not have landed yet, in which case this
+        # upsert inserts the row and needs the NOT NULL timestamp itself
+        swap_info["timestamp"] = int(received_at)
+        await _persist_swap(db, swap_info, status="completed")
+        _remember_completed(order_tx_id)
         print(f"[swap-queue] processed {order_tx_id}")
         return True
     except IntegrityError as e:
@@ -361,55 +566,93 @@ async def _process_swap_item(
 
 
 async def _swap_worker():
-    """Drain the swap queue until empty, then stop."""
-    global swap_worker_task, swap_queue_tx_ids
-    while True:
-        try:
-            order_tx_id, received_at, user = swap_queue.get_nowait()
-        except asyncio.QueueEmpty:
-            print("[swap-queue] idle, stopping worker")
-            swap_worker_task = None
-            return
-
-        try:
-            success = await _process_swap_item(order_tx_id, received_at, user)
-        finally:
-            swap_queue.task_done()
-            # Remove from tracking set when done processing (success or fail)
-            swap_queue_tx_ids.discard(order_tx_id)
-
-        if not success:
-            age = time.time() - received_at
-            if age <= SWAP_RETRY_MAX_AGE_SECONDS:
-                # Re-add to tracking set when requeuing
-                swap_queue_tx_ids.add(order_tx_id)
-                await swap_queue.put((order_tx_id, received_at, user))
-                print(f"[swap-queue] requeue {order_tx_id} (age={age:.1f}s), sleeping {SWAP_RETRY_SLEEP_SECONDS}s")
-                await asyncio.sleep(SWAP_RETRY_SLEEP_SECONDS)
-            else:
-                print(f"[swap-queue] drop stale {order_tx_id} (age={age:.1f}s)")
-                swap_info = {
-                    "transaction_id": order_tx_id,
-                    "execution_tx_id": "",
-                    "user": user or "",
-                    "token_in": "",
-                    "amount_in": 0,
-                    "token_out": "",
-                    "amount_out": 0,
-                    "price": 0,
-                    "value_ada": 0,
-                    "fee": 0,
-                    "price_ada": 0,
-                    "status": "failed",
-                }
-                await _persist_swap(swap_info, status="failed")
+    """Consume the swap queue; stop after SWAP_WORKER_IDLE_SECONDS without work."""
+    # One session per worker for its whole lifetime instead of one per write
+    db = SessionLocal()
+    try:
+        while True:
+            try:
+                order_tx_id, received_at, user, attempt = await asyncio.wait_for(
+                    swap_queue.get(), timeout=SWAP_WORKER_IDLE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                print("[swap-queue] idle, stopping worker")
+                return
+
+            success = False
+            try:
+                success = await _process_swap_item(db, order_tx_id, received_at, user)
+            finally:
+                swap_queue.task_done()
+                # Remove from tracking set when done processing (success or fail)
+                swap_queue_tx_ids.pop(order_tx_id, None)
+
+            if not success:
+                age = time.time() - received_at
+                if age <= SWAP_RETRY_MAX_AGE_SECONDS:
+                    # Keep tracking the tx_id while it waits so it is not enqueued twice
+                    _track_swap(order_tx_id)
+                    attempt += 1
+                    delay = _retry_delay(attempt)
+                    task = asyncio.create_task(
+                        _delayed_requeue(order_tx_id, received_at, user, attempt, delay)
+                    )
+                    _swap_retry_tasks.add(task)
+                    task.add_done_callback(_swap_retry_tasks.discard)
+                    print(f"[swap-queue] requeue {order_tx_id} (age={age:.1f}s, attempt={attempt}) in {delay:.1f}s")
+                else:
+                    print(f"[swap-queue] drop stale {order_tx_id} (age={age:.1f}s)")
+                    swap_info = {
+                        "transaction_id": order_tx_id,
+                        "execution_tx_id": "",
+                        "user": user or "",
+                        "token_in": "",
+                        "amount_in": 0,
+                        "token_out": "",
+                        "amount_out": 0,
+                        "price": 0,
+                        "value_ada": 0,
+                        "fee": 0,
+                        "price_ada": 0,
+                        "timestamp": int(received_at),
+                        "status": "failed",
+                    }
+                    try:
+                        await _persist_swap(db, swap_info, status="failed")
+                    except Exception as e:
+                        print(f"[swap-queue] error marking {order_tx_id} failed: {e}")
+    finally:
+        db.close()
+
+
+def _retry_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for the *attempt*-th retry (1-based)."""
+    delay = min(SWAP_RETRY_MAX_DELAY_SECONDS, SWAP_RETRY_BASE_SECONDS**attempt)
+    return delay + random.uniform(0, 1)
+
+
+async def _delayed_requeue(
+    order_tx_id: str,
+    received_at: float,
+    user: Optional[str],
+    attempt: int,
+    delay: float,
+) -> None:
+    """Put a failed swap back on the queue after *delay* without holding a worker."""
+    await asyncio.sleep(delay)
+    await swap_queue.put((order_tx_id, received_at, user, attempt))
+    await _ensure_swap_worker()
 
 
 async def _ensure_swap_worker():
-    global swap_worker_task
-    if swap_worker_task is None or swap_worker_task.done():
-        swap_worker_task = asyncio.create_task(_swap_worker())
-        print("[swap-queue] worker started")
+    """Top the worker pool back up to SWAP_WORKER_COUNT consumers."""
+    global swap_worker_tasks
+    swap_worker_tasks = [task for task in swap_worker_tasks if not task.done()]
+    missing = SWAP_WORKER_COUNT - len(swap_worker_tasks)
+    for _ in range(missing):
+        swap_worker_tasks.append(asyncio.create_task(_swap_worker()))
+    if missing > 0:
+        print(f"[swap-queue] started {missing} worker(s)")
 
 
 def vault_withdraw_on_chain(
@@ -1,16 +1,44 @@
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
+from contextlib import ExitStack
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import lru_cache
+import logging
+import sys
 import threading
 import time
 
 from sqlalchemy import text
 
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.core.executors import db_pool
+from app.db.session import BackgroundSessionLocal, SessionLocal
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Fraction of the price TTL, at the end of the window, in which a hit triggers
+# a background refresh so callers never wait for the DB on expiry
+PRICE_PREFETCH_FRACTION = 0.2
+
+# The 24h-ago reference close changes once per 5m bar
+PRICE_24H_CACHE_TTL_SECONDS = 300
+
+# How long a symbol with no DB rows is answered as missing without re-querying
+NEGATIVE_CACHE_TTL_SECONDS = 60
+
+# Fixed number of fetch locks; cache keys are striped across them so the lock
+# set stays bounded however many distinct symbols callers send
+FETCH_LOCK_STRIPES = 64
+
+
+@lru_cache(maxsize=4096)
+def _norm(symbol: str) -> str:
+    """Strip and intern a symbol so repeat lookups reuse one string and its hash"""
+    return sys.intern(symbol.strip())
+
+
+@dataclass(slots=True)
 class CachedTokenInfo:
     """Static token information"""
 
@@ -19,16 +47,9 @@ class CachedTokenInfo:
     symbol: str
     logo_url: str
     total_supply: float
-    last_updated: datetime
-    ttl_seconds: int = 3600  # 1 hour default
-
-    @property
-    def is_expired(self) -> bool:
-        """Check if cached info is expired"""
-        return datetime.now() - self.last_updated > timedelta(seconds=self.ttl_seconds)
 
 
-@dataclass
+@dataclass(slots=True)
 class CachedTokenPrice:
     """Token price and 24h statistics"""
 
@@ -39,13 +60,14 @@ class CachedTokenPrice:
     high_24h: float
     volume_24h: float
     market_cap: float
-    last_updated: datetime
-    ttl_seconds: int = 30  # 30 seconds default
+    stale_after: float = 0.0  # time.monotonic() deadline for prefetch
+    refreshing: bool = False
+    last_read: float = 0.0  # time.monotonic() of the last cache hit
 
     @property
-    def is_expired(self) -> bool:
-        """Check if cached price is expired"""
-        return datetime.now() - self.last_updated > timedelta(seconds=self.ttl_seconds)
+    def needs_prefetch(self) -> bool:
+        """Check if cached price is near expiry and not already being refreshed"""
+        return not self.refreshing and time.monotonic() > self.stale_after
 
 
 class TokenPriceCacheManager:
@@ -59,35 +81,53 @@ class TokenPriceCacheManager:
 
     def __new__(cls):
         """Singleton pattern with double-checked locking"""
-        if cls._instance is None:
+        inst = cls._instance
+        if inst is None:
             with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+                inst = cls._instance
+                if inst is None:
+                    inst = super().__new__(cls)
+                    inst._initialized = False
+                    cls._instance = inst
+        return inst
 
     def __init__(self):
         """Initialize cache manager (only once due to singleton)"""
-        if hasattr(self, "_initialized") and self._initialized:
+        if getattr(self, "_initialized", False):
             return
 
-        # Separate caches for info and price data
-        self._info_cache: Dict[str, CachedTokenInfo] = {}
-        self._price_cache: Dict[str, CachedTokenPrice] = {}
-
-        # USDM/ADA price cache (used for USD conversions)
+        # Last known USDM/ADA price (used for USD conversions)
         self._ada_price_cache: Optional[float] = None
-        self._ada_price_updated: Optional[datetime] = None
-        self._ada_price_ttl = 30  # 30 seconds TTL for ADA price
 
         # Configuration from settings
         self._info_ttl = settings.TOKEN_CACHE_INFO_TTL
         self._price_ttl = settings.TOKEN_CACHE_PRICE_TTL
         self._refresh_interval = settings.TOKEN_CACHE_REFRESH_INTERVAL
         self._enable_background_refresh = settings.TOKEN_CACHE_ENABLE_BACKGROUND_REFRESH
+        self._max_size = settings.TOKEN_CACHE_MAX_SIZE
+
+        # Separate bounded LRU caches for info and price data
+        self._info_cache = TTLCache(maxsize=self._max_size, ttl=self._info_ttl)
+        self._price_cache = TTLCache(maxsize=self._max_size, ttl=self._price_ttl)
+
+        # Resolved get_pair_price results, kept well under the price TTL
+        self._pair_cache = TTLCache(maxsize=1024, ttl=max(1, self._price_ttl // 6))
+
+        # Close from 24h ago keyed by (pair, bar open_time)
+        self._price_24h_cache = TTLCache(
+            maxsize=self._max_size, ttl=PRICE_24H_CACHE_TTL_SECONDS
+        )
+
+        # Negative caches for symbols the DB has no data for
+        self._info_neg = TTLCache(maxsize=1024, ttl=NEGATIVE_CACHE_TTL_SECONDS)
+        self._price_neg = TTLCache(maxsize=1024, ttl=NEGATIVE_CACHE_TTL_SECONDS)
 
         # Thread safety
         self._cache_lock = threading.RLock()
+        # Striped fetch locks so misses on different symbols run in parallel
+        self._key_locks: List[threading.Lock] = [
+            threading.Lock() for _ in range(FETCH_LOCK_STRIPES)
+        ]
 
         # Background refresh state
         self._running = False
@@ -95,62 +135,9 @@ class TokenPriceCacheManager:
 
         self._initialized = True
 
-    def _get_ada_price_usd(self) -> Optional[float]:
-        """Get USDM/ADA price in USD, cached for 30 seconds"""
-        now = datetime.now()
-
-        # Check cache outside lock first (read-only check)
-        if (
-            self._ada_price_cache is not None
-            and self._ada_price_updated is not None
-            and (now - self._ada_price_updated).total_seconds() < self._ada_price_ttl
-        ):
-            return self._ada_price_cache
-
-        # Need to fetch - acquire lock
-        with self._cache_lock:
-            # Double-check after acquiring lock
-            if (
-                self._ada_price_cache is not None
-                and self._ada_price_updated is not None
-                and (now - self._ada_price_updated).total_seconds()
-                < self._ada_price_ttl
-            ):
-                return self._ada_price_cache
-
-            # Fetch fresh price from database
-            try:
-                db = SessionLocal()
-                try:
-                    time_24h_ago = int(now.timestamp()) - 24 * 60 * 60
-                    query = text(
-                        f"""
-                        SELECT close as price_ada
-                        FROM proddb.coin_prices_5m cph
-                        WHERE symbol='USDM/ADA'
-                            AND open_time > {time_24h_ago}
-                        ORDER BY open_time DESC
-                        LIMIT 1
-                        """
-                    )
-                    result = db.execute(query).fetchone()
-
-                    if result and hasattr(result, "price_ada") and result.price_ada:
-                        self._ada_price_cache = float(result.price_ada)
-                        self._ada_price_updated = now
-                        return self._ada_price_cache
-                finally:
-                    db.close()
-            except Exception as e:
-                print(f"Failed to fetch ADA price: {e}")
-                # Return cached value even if expired as fallback
-                return self._ada_price_cache
-
-        return None
-
     def _normalize_symbols(self, symbols: List[str]) -> List[str]:
         """Normalize and deduplicate symbols"""
-        normalized = [s.strip() for s in symbols if s.strip()]
+        normalized = [n for n in map(_norm, symbols) if n]
         # Remove duplicates while preserving order
         seen = set()
         return [s for s in normalized if s not in seen and not seen.add(s)]
@@ -163,300 +150,310 @@ class TokenPriceCacheManager:
         if not normalized_symbols:
             return {}
 
-        result: Dict[str, CachedTokenInfo] = {}
-        db = SessionLocal()
+        query = text(
+            """
+            SELECT id, name, symbol, logo_url, total_supply
+            FROM proddb.tokens
+            WHERE symbol = ANY(:symbols)
+            """
+        )
+        # DB errors propagate so callers can tell a failure from "not found"
+        with SessionLocal() as db:
+            tokens = db.execute(query, {"symbols": normalized_symbols}).fetchall()
 
-        try:
-            symbols_str = "('" + "', '".join(normalized_symbols) + "')"
-            query = text(
-                f"""
-                SELECT id, name, symbol, logo_url, total_supply
-                FROM proddb.tokens
-                WHERE symbol IN {symbols_str}
-                """
-            )
-            tokens = db.execute(query).fetchall()
-
-            now = datetime.now()
-            for token in tokens:
-                symbol = str(token.symbol) if hasattr(token, "symbol") else ""
-                if symbol:
-                    result[symbol] = CachedTokenInfo(
-                        id=str(token.id) if hasattr(token, "id") else "",
-                        name=str(token.name) if hasattr(token, "name") else "",
-                        symbol=symbol,
-                        logo_url=str(token.logo_url)
-                        if hasattr(token, "logo_url")
-                        else "",
-                        total_supply=float(token.total_supply)
-                        if hasattr(token, "total_supply") and token.total_supply
-                        else 0.0,
-                        last_updated=now,
-                        ttl_seconds=self._info_ttl,
-                    )
-        except Exception as e:
-            print(f"Failed to fetch token info from DB: {e}")
-        finally:
-            db.close()
+        result: Dict[str, CachedTokenInfo] = {}
+        for token in tokens:
+            # Row attributes always exist for selected columns; only guard NULLs
+            symbol = str(token.symbol) if token.symbol is not None else ""
+            if symbol:
+                result[symbol] = CachedTokenInfo(
+                    id=str(token.id),
+                    name=str(token.name),
+                    symbol=symbol,
+                    logo_url=str(token.logo_url),
+                    total_supply=float(token.total_supply or 0.0),
+                )
 
         return result
 
-    def get_token_info(self, symbol: str) -> Optional[CachedTokenInfo]:
-        """Get static token info, check cache first, then fetch from proddb.tokens if needed"""
-        symbol = symbol.strip()
-
-        # Quick check without lock (read-only)
-        cached = self._info_cache.get(symbol)
-        if cached and not cached.is_expired:
-            return cached
-
-        # Need to fetch - acquire lock
-        with self._cache_lock:
-            # Double-check after acquiring lock
-            cached = self._info_cache.get(symbol)
-            if cached and not cached.is_expired:
-                return cached
-
-            # Fetch from DB if missing or expired
+    def _locks_for(self, name: str, symbols: List[str]) -> List[threading.Lock]:
+        """Get the fetch locks covering these symbols, each once and in stripe order"""
+        stripes = {hash((name, symbol)) % FETCH_LOCK_STRIPES for symbol in symbols}
+        return [self._key_locks[i] for i in sorted(stripes)]
+
+    def _get_cached_bulk(
+        self,
+        name: str,
+        cache: TTLCache,
+        negative: TTLCache,
+        symbols: List[str],
+        fetch,
+    ) -> Dict:
+        """Resolve symbols from cache, fetching all misses with a single DB call"""
+        result: Dict = {}
+        missing: List[str] = []
+
+        # Quick check without lock (a TTLCache miss means absent or expired)
+        for symbol in self._normalize_symbols(symbols):
+            cached = cache.get(symbol)
+            if cached is not None:
+                result[symbol] = cached
+            elif symbol not in negative:
+                missing.append(symbol)
+
+        if not missing:
+            return result
+
+        # Need to fetch - lock only the stripes of the missing symbols, in a
+        # stable order so overlapping batches cannot deadlock
+        with ExitStack() as stack:
+            for lock in self._locks_for(name, missing):
+                stack.enter_context(lock)
+
+            # Double-check after acquiring locks
+            to_fetch: List[str] = []
+            for symbol in missing:
+                cached = cache.get(symbol)
+                if cached is not None:
+                    result[symbol] = cached
+                else:
+                    to_fetch.append(symbol)
+
+            if not to_fetch:
+                return result
+
+            # Fetch all missing or expired symbols in one roundtrip
             try:
-                fresh_info = self._fetch_token_info_from_db([symbol])
-                if symbol in fresh_info:
-                    self._info_cache[symbol] = fresh_info[symbol]
-                    return fresh_info[symbol]
+                fresh = fetch(to_fetch)
             except Exception as e:
-                print(f"Failed to fetch token info for {symbol}: {e}")
+                logger.warning("Failed to fetch %s %s: %s", name, to_fetch, e)
                 # Return stale data if available
-                return cached if cached else None
+                for symbol in to_fetch:
+                    stale = cache.get_stale(symbol)
+                    if stale is not None:
+                        result[symbol] = stale
+                return result
+
+            cache.update(fresh)
+            result.update(fresh)
+            for symbol in to_fetch:
+                if symbol in fresh:
+                    negative.pop(symbol)
+                else:
+                    negative[symbol] = True
+
+        return result
 
-        return None
+    def get_token_infos(self, symbols: List[str]) -> Dict[str, CachedTokenInfo]:
+        """Get static info for several tokens, fetching all cache misses in one query"""
+        return self._get_cached_bulk(
+            "info",
+            self._info_cache,
+            self._info_neg,
+            symbols,
+            self._fetch_token_info_from_db,
+        )
+
+    def get_token_info(self, symbol: str) -> Optional[CachedTokenInfo]:
+        """Get static token info, check cache first, then fetch from proddb.tokens if needed"""
+        return self.get_token_infos([symbol]).get(_norm(symbol))
 
     def _fetch_token_price_from_db(
-        self, symbols: List[str]
+        self, symbols: List[str], session_factory=SessionLocal
     ) -> Dict[str, CachedTokenPrice]:
         """Fetch token price data (frequently updates)"""
         normalized_symbols = self._normalize_symbols(symbols)
         if not normalized_symbols:
             return {}
 
-        # Get cached ADA price for USD conversions
-        price_ada = self._get_ada_price_usd()
-        if price_ada is None or price_ada <= 0:
-            print("Warning: ADA price not available, cannot convert to USD")
-            return {}
-
         time_now = (int(datetime.now().timestamp()) // 300 - 1) * 300
         time_24h_ago = time_now - 24 * 60 * 60
-        now = datetime.now()
+        stale_after = (
+            time.monotonic() + (1 - PRICE_PREFETCH_FRACTION) * self._price_ttl
+        )
         result: Dict[str, CachedTokenPrice] = {}
 
-        # Process ADA separately if needed
-        process_ada = "ADA" in normalized_symbols
-        if process_ada:
-            normalized_symbols.remove("ADA")
+        # ADA itself is priced from the USDM/ADA pair
+        pair_by_symbol = {
+            symbol: "USDM/ADA" if symbol == "ADA" else f"{symbol}/ADA"
+            for symbol in normalized_symbols
+        }
 
-        db = SessionLocal()
-        try:
-            # Fetch ADA data if needed
-            if process_ada:
-                # Get current USDM/ADA price and change_24h
-                price_query = text(
-                    f"""
-                    SELECT price, ((price - price_24h) / price) * 100 as change_24h
-                    FROM (
-                        SELECT open_time, close as price, 
-                               lead(close, 3) over (ORDER BY open_time desc) price_24h, 
-                               row_number() over (ORDER BY open_time desc) as r
-                        FROM proddb.coin_prices_5m cph
-                        WHERE symbol='USDM/ADA'
-                            AND ((open_time >= {time_24h_ago} - 900 AND open_time <= {time_24h_ago})
-                                OR open_time > {time_now} - 600)
-                    ) coin
-                    WHERE r = 1
-                    """
-                )
-                price_result = db.execute(price_query).fetchone()
-
-                # Get 24h stats
-                stats_query = text(
-                    f"""
-                    SELECT min(low) as low_24h, max(high) as high_24h, sum(volume) as volume_24h
-                    FROM proddb.coin_prices_1h cph
-                    WHERE symbol='USDM/ADA'
-                        AND open_time > {time_24h_ago}
-                    """
-                )
-                stats_result = db.execute(stats_query).fetchone()
-
-                if price_result:
-                    change_24h = (
-                        float(price_result.change_24h)
-                        if hasattr(price_result, "change_24h")
-                        and price_result.change_24h
-                        else 0.0
-                    )
-                    low_24h_usd = (
-                        float(stats_result.low_24h)
-                        if stats_result
-                        and hasattr(stats_result, "low_24h")
-                        and stats_result.low_24h
-                        else 0.0
-                    )
-                    high_24h_usd = (
-                        float(stats_result.high_24h)
-                        if stats_result
-                        and hasattr(stats_result, "high_24h")
-                        and stats_result.high_24h
-                        else 0.0
-                    )
-                    volume_24h_usd = (
-                        float(stats_result.volume_24h)
-                        if stats_result
-                        and hasattr(stats_result, "volume_24h")
-                        and stats_result.volume_24h
-                        else 0.0
-                    )
-
-                    result["ADA"] = CachedTokenPrice(
-                        price=price_ada,
-                        price_on_ada=1.0,
-                        change_24h=change_24h,
-                        low_24h=low_24h_usd,
-                        high_24h=high_24h_usd,
-                        volume_24h=volume_24h_usd,
-                        market_cap=0.0,
-                        last_updated=now,
-                        ttl_seconds=self._price_ttl,
-                    )
-
-            # Process other tokens
-            if normalized_symbols:
-                pairs_list = [f"{symbol}/ADA" for symbol in normalized_symbols]
-                pairs_str = "('" + "', '".join(pairs_list) + "')"
-
-                # Get current prices and 24h stats in parallel queries
-                price_query = text(
-                    f"""
-                    SELECT symbol, price, ((price - price_24h) / price) * 100 as change_24h
-                    FROM (
-                        SELECT symbol, open_time, close as price, 
-                               lead(close, 3) over (PARTITION BY symbol ORDER BY open_time desc) price_24h, 
-                               row_number() over (PARTITION BY symbol ORDER BY open_time desc) as r
-                        FROM proddb.coin_prices_5m cph
-                        WHERE symbol IN {pairs_str}
-                            AND ((open_time >= {time_24h_ago} - 900 AND open_time <= {time_24h_ago})
-                                OR open_time > {time_now} - 600)
-                    ) coin
-                    WHERE r = 1
-                    """
-                )
-                stats_query = text(
-                    f"""
-                    SELECT symbol, min(low) as low_24h, max(high) as high_24h, sum(volume) as volume_24h
-                    FROM proddb.coin_prices_1h cph
-                    WHERE symbol IN {pairs_str}
-                        AND open_time > {time_24h_ago}
-                    GROUP BY symbol
-                    """
-                )
+        # The 24h-ago close only moves with the 5m bar, so it is cached per bar
+        # and only looked up for pairs not already known
+        price_24h_by_pair: Dict[str, float] = {}
+        pairs_24h: List[str] = []
+        for pair in pair_by_symbol.values():
+            price_24h = self._price_24h_cache.get((pair, time_24h_ago))
+            if price_24h is None:
+                pairs_24h.append(pair)
+            else:
+                price_24h_by_pair[pair] = price_24h
+
+        # USDM/ADA rate, current prices and 24h stats in one roundtrip
+        query = text(
+            """
+            WITH ada AS (
+                SELECT close as price_ada
+                FROM proddb.coin_prices_5m cph
+                WHERE symbol='USDM/ADA'
+                    AND open_time > :time_24h_ago
+                ORDER BY open_time DESC
+                LIMIT 1
+            ),
+            prices AS (
+                SELECT DISTINCT ON (symbol) symbol, close as price
+                FROM proddb.coin_prices_5m cph
+                WHERE symbol = ANY(:pairs)
+                    AND open_time > :time_now - 600
+                ORDER BY symbol, open_time DESC
+            ),
+            prices_24h AS (
+                SELECT DISTINCT ON (symbol) symbol, close as price_24h
+                FROM proddb.coin_prices_5m cph
+                WHERE symbol = ANY(:pairs_24h)
+                    AND open_time >= :time_24h_ago - 900
+                    AND open_time <= :time_24h_ago
+                ORDER BY symbol, open_time DESC
+            ),
+            stats AS (
+                SELECT symbol, min(low) as low_24h, max(high) as high_24h, sum(volume) as volume_24h
+                FROM proddb.coin_prices_1h cph
+                WHERE symbol = ANY(:pairs)
+                    AND open_time > :time_24h_ago
+                GROUP BY symbol
+            )
+            SELECT prices.symbol, prices.price, prices_24h.price_24h,
+                   stats.low_24h, stats.high_24h, stats.volume_24h, ada.price_ada
+            FROM prices
+            LEFT JOIN prices_24h ON prices_24h.symbol = prices.symbol
+            LEFT JOIN stats ON stats.symbol = prices.symbol
+            LEFT JOIN ada ON true
+            """
+        )
+        params = {
+            "pairs": list(pair_by_symbol.values()),
+            "pairs_24h": pairs_24h,
+            "time_now": time_now,
+            "time_24h_ago": time_24h_ago,
+        }
+        # DB errors propagate so callers can tell a failure from "not found"
+        with session_factory() as db:
+            rows = db.execute(query, params).fetchall()
+
+        price_dict = {row.symbol: row for row in rows}
+        for row in rows:
+            if row.symbol in price_24h_by_pair:
+                continue
+            # 0.0 marks "no bar 24h ago" so it is not looked up again
+            price_24h = float(row.price_24h) if row.price_24h else 0.0
+            price_24h_by_pair[row.symbol] = price_24h
+            self._price_24h_cache[(row.symbol, time_24h_ago)] = price_24h
+
+        # price_ada is repeated on every row; keep the last good value as
+        # a fallback for windows where USDM/ADA has no recent bar
+        price_ada = next(
+            (float(row.price_ada) for row in rows if row.price_ada), None
+        )
+        if price_ada is not None:
+            self._ada_price_cache = price_ada
+        else:
+            price_ada = self._ada_price_cache
+        if price_ada is None or price_ada <= 0:
+            raise RuntimeError("ADA price not available, cannot convert to USD")
+
+        # Convert to USD using price_ada
+        for symbol, pair in pair_by_symbol.items():
+            row = price_dict.get(pair)
+            if not row:
+                continue
+
+            is_ada = symbol == "ADA"
+            # USDM/ADA stats are already in USD terms
+            scale = 1.0 if is_ada else price_ada
+            price_ada_token = float(row.price or 0.0)
+            price_24h = price_24h_by_pair.get(pair, 0.0)
+            change_24h = (
+                (price_ada_token - price_24h) / price_ada_token * 100
+                if price_ada_token and price_24h
+                else 0.0
+            )
 
-                price_results = db.execute(price_query).fetchall()
-                stats_results = db.execute(stats_query).fetchall()
-
-                price_dict = {row.symbol: row for row in price_results}
-                stats_dict = {row.symbol: row for row in stats_results}
-
-                # Convert to USD using cached price_ada
-                for symbol in normalized_symbols:
-                    pair = f"{symbol}/ADA"
-                    price_row = price_dict.get(pair)
-                    stats_row = stats_dict.get(pair)
-
-                    if price_row:
-                        price_ada_token = (
-                            float(price_row.price)
-                            if hasattr(price_row, "price") and price_row.price
-                            else 0.0
-                        )
-                        change_24h = (
-                            float(price_row.change_24h)
-                            if hasattr(price_row, "change_24h") and price_row.change_24h
-                            else 0.0
-                        )
-
-                        # Convert to USD
-                        price_usd = (
-                            price_ada_token / price_ada if price_ada > 0 else 0.0
-                        )
-
-                        # Get 24h stats and convert to USD
-                        low_24h_usd = (
-                            (float(stats_row.low_24h) / price_ada)
-                            if stats_row
-                            and hasattr(stats_row, "low_24h")
-                            and stats_row.low_24h
-                            else 0.0
-                        )
-                        high_24h_usd = (
-                            (float(stats_row.high_24h) / price_ada)
-                            if stats_row
-                            and hasattr(stats_row, "high_24h")
-                            and stats_row.high_24h
-                            else 0.0
-                        )
-                        volume_24h_usd = (
-                            (float(stats_row.volume_24h) / price_ada)
-                            if stats_row
-                            and hasattr(stats_row, "volume_24h")
-                            and stats_row.volume_24h
-                            else 0.0
-                        )
-
-                        result[symbol] = CachedTokenPrice(
-                            price=price_usd,
-                            price_on_ada=price_ada_token,
-                            change_24h=change_24h,
-                            low_24h=low_24h_usd,
-                            high_24h=high_24h_usd,
-                            volume_24h=volume_24h_usd,
-                            market_cap=0.0,
-                            last_updated=now,
-                            ttl_seconds=self._price_ttl,
-                        )
+            # Get 24h stats and convert to USD
+            low_24h_usd = float(row.low_24h or 0.0) / scale
+            high_24h_usd = float(row.high_24h or 0.0) / scale
+            volume_24h_usd = float(row.volume_24h or 0.0) / scale
+
+            result[symbol] = CachedTokenPrice(
+                price=price_ada if is_ada else price_ada_token / price_ada,
+                price_on_ada=1.0 if is_ada else price_ada_token,
+                change_24h=change_24h,
+                low_24h=low_24h_usd,
+                high_24h=high_24h_usd,
+                volume_24h=volume_24h_usd,
+                market_cap=0.0,
+                stale_after=stale_after,
+            )
+
+        return result
+
+    def _prefetch_prices(self, symbols: List[str]):
+        """Refresh near-expiry prices in the background"""
+        try:
+            fresh_prices = self._fetch_token_price_from_db(symbols)
+            with self._cache_lock:
+                self._price_cache.update(fresh_prices)
         except Exception as e:
-            print(f"Failed to fetch token prices from DB: {e}")
+            logger.warning("Failed to prefetch prices for %s: %s", symbols, e)
         finally:
-            db.close()
+            # Entries that were not replaced may be retried on the next hit
+            for symbol in symbols:
+                cached = self._price_cache.get(symbol)
+                if cached:
+                    cached.refreshing = False
+
+    def get_token_prices(self, symbols: List[str]) -> Dict[str, CachedTokenPrice]:
+        """Get price data for several tokens, fetching all cache misses in one query"""
+        result = self._get_cached_bulk(
+            "price",
+            self._price_cache,
+            self._price_neg,
+            symbols,
+            self._fetch_token_price_from_db,
+        )
+
+        # Serve near-expiry hits as-is and refresh them in the background
+        now = time.monotonic()
+        with self._cache_lock:
+            for cached in result.values():
+                cached.last_read = now
+            due = [s for s, cached in result.items() if cached.needs_prefetch]
+            for symbol in due:
+                result[symbol].refreshing = True
+        if due:
+            # Pre-expiry refreshes run on the shared DB pool, off the request path
+            db_pool.submit(self._prefetch_prices, due)
 
         return result
 
     def get_token_price(self, symbol: str) -> Optional[CachedTokenPrice]:
         """Get token price data, check cache first, then fetch from coin_prices tables if needed"""
-        symbol = symbol.strip()
-
-        # Quick check without lock (read-only)
-        cached = self._price_cache.get(symbol)
-        if cached and not cached.is_expired:
-            return cached
+        return self.get_token_prices([symbol]).get(_norm(symbol))
 
-        # Need to fetch - acquire lock
-        with self._cache_lock:
-            # Double-check after acquiring lock
-            cached = self._price_cache.get(symbol)
-            if cached and not cached.is_expired:
-                return cached
-
-            # Fetch from DB if missing or expired
-            try:
-                fresh_prices = self._fetch_token_price_from_db([symbol])
-                if symbol in fresh_prices:
-                    self._price_cache[symbol] = fresh_prices[symbol]
-                    return fresh_prices[symbol]
-            except Exception as e:
-                print(f"Failed to fetch token price for {symbol}: {e}")
-                # Return stale data if available
-                return cached if cached else None
+    def get_token_market_data(
+        self, symbols: List[str]
+    ) -> Tuple[Dict[str, CachedTokenInfo], Dict[str, CachedTokenPrice]]:
+        """Get info and price data for several tokens, fetching both concurrently"""
+        normalized_symbols = self._normalize_symbols(symbols)
+        if all(self._info_cache.get(s) is not None for s in normalized_symbols):
+            # Info is long-lived and usually cached; skip the thread handoff
+            return self.get_token_infos(normalized_symbols), self.get_token_prices(
+                normalized_symbols
+            )
 
-        return None
+        info_future = db_pool.submit(self.get_token_infos, normalized_symbols)
+        prices = self.get_token_prices(normalized_symbols)
+        return info_future.result(), prices
 
     def get_pair_price(self, pair: str) -> Optional[float]:
         """
@@ -473,70 +470,81 @@ class TokenPriceCacheManager:
         Returns:
             Current price as float, or None if pair cannot be resolved
         """
+        # Resolved pairs are memoized briefly by the raw pair string, so hot
+        # pairs skip parsing and both cache probes entirely
+        cached = self._pair_cache.get(pair)
+        if cached is not None:
+            return cached
+
+        price = self._resolve_pair_price(pair)
+        if price is not None:
+            self._pair_cache[pair] = price
+        return price
+
+    def _resolve_pair_price(self, pair: str) -> Optional[float]:
+        """Parse a 'BASE/QUOTE' pair and compute its price from cached token prices"""
         pair = pair.strip()
 
         # Parse pair
         if "/" not in pair:
-            print(f"Invalid pair format: {pair}. Expected format: 'BASE/QUOTE'")
+            logger.warning(
+                "Invalid pair format: %s. Expected format: 'BASE/QUOTE'", pair
+            )
             return None
 
         base, quote = pair.split("/", 1)
-        base = base.strip()
-        quote = quote.strip()
+        base = _norm(base)
+        quote = _norm(quote)
 
         if not base or not quote:
-            print(f"Invalid pair format: {pair}")
+            logger.warning("Invalid pair format: %s", pair)
             return None
 
-        # Case 1: Direct pair (TOKEN/ADA) - get price directly
-        if quote == "ADA":
-            price_data = self.get_token_price(base)
-            if price_data:
-                return price_data.price_on_ada
+        # Resolve both legs against ADA in one lookup; ADA itself is 1.0, so
+        # direct (TOKEN/ADA), inverted (ADA/TOKEN) and cross pairs share
+        # Price = (BASE/ADA) / (QUOTE/ADA)
+        prices = self.get_token_prices([s for s in (base, quote) if s != "ADA"])
+        on_ada: Dict[str, float] = {"ADA": 1.0}
+        for symbol, price_data in prices.items():
+            on_ada[symbol] = price_data.price_on_ada
+
+        base_price = on_ada.get(base)
+        quote_price = on_ada.get(quote)
+        if base_price is None or not quote_price or quote_price <= 0:
             return None
-
-        # Case 2: Inverted pair (ADA/TOKEN) - return 1/price
-        if base == "ADA":
-            price_data = self.get_token_price(quote)
-            if price_data and price_data.price_on_ada > 0:
-                return 1.0 / price_data.price_on_ada
-            return None
-
-        # Case 3: Cross pair (TOKEN1/TOKEN2) - calculate from both prices
-        # Price = (TOKEN1/ADA) / (TOKEN2/ADA)
-        base_price_data = self.get_token_price(base)
-        quote_price_data = self.get_token_price(quote)
-
-        if base_price_data and quote_price_data:
-            base_price = base_price_data.price_on_ada
-            quote_price = quote_price_data.price_on_ada
-
-            if quote_price > 0:
-                return base_price / quote_price
-
-        return None
+        return base_price / quote_price
 
     def _refresh_all_prices(self):
-        """Background refresh method - updates price cache for all cached tokens"""
+        """Background refresh method - updates price cache for recently read tokens"""
+        # Entries nobody has read for a couple of cycles are left to expire
+        active_since = time.monotonic() - 2 * self._refresh_interval
         with self._cache_lock:
-            if not self._price_cache:
-                return
-            symbols = list(self._price_cache.keys())
+            symbols = [
+                symbol
+                for symbol in self._price_cache.keys()
+                if (cached := self._price_cache.get(symbol)) is not None
+                and cached.last_read >= active_since
+            ]
 
         if not symbols:
             return
 
         try:
             # Fetch fresh prices from DB
-            fresh_prices = self._fetch_token_price_from_db(symbols)
+            # Background sessions come from their own small pool
+            fresh_prices = self._fetch_token_price_from_db(
+                symbols, session_factory=BackgroundSessionLocal
+            )
 
             # Update cache with fresh data
             with self._cache_lock:
                 for symbol, price_data in fresh_prices.items():
-                    if symbol in self._price_cache:
+                    cached = self._price_cache.get(symbol)
+                    if cached is not None:
+                        price_data.last_read = cached.last_read
                         self._price_cache[symbol] = price_data
         except Exception as e:
-            print(f"Failed to refresh prices in background: {e}")
+            logger.warning("Failed to refresh prices in background: %s", e)
 
     def _background_refresh_loop(self):
         """Background refresh loop - runs continuously if enabled"""
@@ -549,8 +557,8 @@ class TokenPriceCacheManager:
                 # Sleep for remaining time in interval, but at least 1 second
                 sleep_time = max(1, self._refresh_interval - elapsed)
                 time.sleep(sleep_time)
-            except Exception as e:
-                print(f"Error in price refresh loop: {e}")
+            except Exception:
+                logger.exception("Error in price refresh loop")
                 time.sleep(5)  # Brief pause on error
 
     def start_background_refresh(self):
@@ -578,24 +586,20 @@ class TokenPriceCacheManager:
         with self._cache_lock:
             self._info_cache.clear()
             self._price_cache.clear()
+            self._info_neg.clear()
+            self._price_neg.clear()
+            self._pair_cache.clear()
 
     def get_cache_stats(self) -> Dict:
         """Get cache statistics"""
         with self._cache_lock:
             total_info_cached = len(self._info_cache)
             total_price_cached = len(self._price_cache)
-            expired_info_count = sum(
-                1 for c in self._info_cache.values() if c.is_expired
-            )
-            expired_price_count = sum(
-                1 for c in self._price_cache.values() if c.is_expired
-            )
 
         return {
             "info_cache_size": total_info_cached,
             "price_cache_size": total_price_cached,
-            "expired_info_count": expired_info_count,
-            "expired_price_count": expired_price_count,
+            "cache_max_size": self._max_size,
             "background_refresh_enabled": self._enable_background_refresh,
             "background_refresh_running": self._running,
             "info_ttl_seconds": self._info_ttl,
@@ -1,14 +1,21 @@
 """Resolve vault_id to on-chain deployment params from DB (vault + vault_config_utxo)."""
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache
 from app.models.vault import Vault, VaultConfigUtxo
 
+# Deployment params change only when a vault is redeployed or its config UTxO
+# is respent, so lookups are cached by vault_id
+VAULT_DEPLOYMENT_CACHE_TTL_SECONDS = 300
+_deployment_cache = TTLCache(maxsize=4096, ttl=VAULT_DEPLOYMENT_CACHE_TTL_SECONDS)
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class VaultDeploymentInfo:
     """On-chain params for a vault: script address, pool policy id and pool_name (from pool_id), config UTxO."""
     script_address: str
@@ -20,6 +27,7 @@ class VaultDeploymentInfo:
     manager_pkh: Optional[str]
 
 
+@lru_cache(maxsize=1024)
 def parse_pool_id(pool_id: Optional[str]) -> tuple[str, str]:
     """Split vault.pool_id ('policy_id.pool_name') into policy_id and pool_name hex."""
     if not pool_id or "." not in pool_id:
@@ -28,16 +36,37 @@ def parse_pool_id(pool_id: Optional[str]) -> tuple[str, str]:
     return (parts[0].strip(), parts[1].strip()) if len(parts) == 2 else ("", "")
 
 
-def get_vault_deployment_info(db: Session, vault_id: str) -> Optional[VaultDeploymentInfo]:
+def invalidate_vault(vault_id: str) -> None:
+    """Drop the cached deployment info for a vault after its rows change."""
+    _deployment_cache.pop((vault_id or "").strip().lower())
+
+
+def get_vault_deployment_info(
+    db: Session, vault_id: str, fresh: bool = False
+) -> Optional[VaultDeploymentInfo]:
     """
     Load deployment info for a vault from proddb.vault and proddb.vault_config_utxo.
     Returns None if vault not found or missing required fields (address, pool_id).
+    Results are cached for a few minutes; pass fresh=True to bypass the cache when
+    the config UTxO is about to be spent.
     """
     vault_id = (vault_id or "").strip().lower()
     if not vault_id:
         return None
 
-    vault = db.query(Vault).filter(Vault.id == vault_id).first()
+    if not fresh:
+        hit = _deployment_cache.get(vault_id)
+        if hit is not None:
+            return hit
+
+    # Vault and its (optional) config UTxO in one roundtrip
+    row = (
+        db.query(Vault, VaultConfigUtxo)
+        .outerjoin(VaultConfigUtxo, VaultConfigUtxo.vault_id == Vault.id)
+        .filter(Vault.id == vault_id)
+        .first()
+    )
+    vault, config_utxo = row if row else (None, None)
     if not vault or not vault.address:
         return None
 
@@ -47,12 +76,11 @@ def get_vault_deployment_info(db: Session, vault_id: str) -> Optional[VaultDeplo
 
     config_tx_id: Optional[str] = None
     config_index: Optional[int] = None
-    config_utxo = db.query(VaultConfigUtxo).filter(VaultConfigUtxo.vault_id == vault_id).first()
     if config_utxo and config_utxo.tx_hash is not None:
         config_tx_id = config_utxo.tx_hash.strip()
         config_index = config_utxo.utxo_id if config_utxo.utxo_id is not None else 0
 
-    return VaultDeploymentInfo(
+    info = VaultDeploymentInfo(
         script_address=vault.address.strip(),
         factory_policy_id=factory_policy_id,
         pool_name=pool_name,
@@ -61,3 +89,5 @@ def get_vault_deployment_info(db: Session, vault_id: str) -> Optional[VaultDeplo
         config_utxo_index=config_index,
         manager_pkh=vault.manager_pkh.strip() if vault.manager_pkh else None,
     )
+    _deployment_cache[vault_id] = info
+    return info
@@ -1,29 +1,65 @@
 import asyncio
+import logging
 import time
+from collections import OrderedDict, deque
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple, cast
 
 import cbor2
 from blockfrost.utils import ApiError, Namespace
-from pycardano import Address, hash, RawPlutusData
+from pycardano import Address, hash
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
 
 from app.api.endpoints.vault import get_vault_info
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.executors import blockfrost_pool, db_pool
 from app.db.session import SessionLocal
 from app.models.vault import UserEarning, VaultLog
 from app.services.onchain_process import context
 from app.services.vault_deployment import get_vault_deployment_info
 
+logger = logging.getLogger(__name__)
+
 # Retry and queue configuration
 VAULT_DEPOSIT_RETRY_MAX_AGE_SECONDS = 180
 VAULT_DEPOSIT_RETRY_SLEEP_SECONDS = 15
 VAULT_DEPOSIT_WARN_THRESHOLD = 20
+VAULT_DEPOSIT_CHAIN_INFO_TTL_SECONDS = 120
+VAULT_DEPOSIT_COMPLETED_CACHE_SIZE = 10_000
+
+# (tx_id, wallet_address, vault_id, received_at)
+VaultDepositItem = Tuple[str, str, str, float]
+
+# Pending deposits grouped by vault_id and served round-robin, so a burst
+# for one vault cannot hold up deposits for the others
+vault_deposit_backlogs: "OrderedDict[str, Deque[VaultDepositItem]]" = OrderedDict()
+_vault_deposit_ready = asyncio.Event()
+vault_deposit_worker_tasks: List[asyncio.Task] = []
+_vault_deposit_retry_tasks: Set[asyncio.Task] = set()  # strong refs to pending requeues
+
+
+@dataclass
+class VaultDepositQueueEntry:
+    """Tracking state for a (tx_id, vault_id) from enqueue until its terminal result."""
+    received_at: float
+    state: str = "queued"  # queued | processing | retrying
+    # When worker finishes (tx on-chain, checks done), send result to this websocket if set
+    websocket: Any = None
+
+
+# Entries are added and dropped between awaits on the event loop, so no lock is needed
+vault_deposit_entries: Dict[Tuple[str, str], VaultDepositQueueEntry] = {}
+# Recently completed (tx_id, vault_id) keys (LRU), lets duplicate submits skip the DB
+_completed_deposits: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
 
-vault_deposit_queue: asyncio.Queue[Tuple[str, str, str, float]] = asyncio.Queue()
-vault_deposit_worker_task: Optional[asyncio.Task] = None
-vault_deposit_queue_keys: Set[Tuple[str, str]] = set()
-# When worker finishes (tx on-chain, checks done), send result to this websocket if registered
-vault_deposit_done_callbacks: Dict[Tuple[str, str], Any] = {}
+
+# Validated on-chain data per (tx_id, vault_id, wallet_address). A tx's outputs never
+# change, so a deposit that fails after validation (e.g. a DB error) and is resubmitted
+# skips the Blockfrost fetch and datum parsing
+_chain_info_cache = TTLCache(maxsize=1024, ttl=VAULT_DEPOSIT_CHAIN_INFO_TTL_SECONDS)
 
 
 class VaultDepositRetryableError(Exception):
@@ -40,11 +76,6 @@ class VaultDepositChainInfo:
     contributor_address: str
 
 
-def register_vault_deposit_done_callback(tx_id: str, vault_id: str, websocket: Any) -> None:
-    """Register a websocket to receive the final result when on-chain processing is done."""
-    vault_deposit_done_callbacks[(tx_id, vault_id)] = websocket
-
-
 def send_vault_deposit_done_result(
     tx_id: str,
     vault_id: str,
@@ -55,7 +86,8 @@ def send_vault_deposit_done_result(
 ) -> None:
     """Send the final result to the client that submitted this vault_deposit (if registered)."""
     # if ws is None:
-    ws = vault_deposit_done_callbacks.pop((tx_id, vault_id), None)
+    entry = vault_deposit_entries.pop((tx_id, vault_id), None)
+    ws = entry.websocket if entry is not None else None
     if ws:
         payload = {
             "message": message,
@@ -84,19 +116,26 @@ async def queue_vault_deposit_request(
     If done_websocket is provided, the client will receive a second message when on-chain checks
     finish: { message: "oke" } or { message: "failed", reason: "..." }.
     """
-    global vault_deposit_queue_keys
     key = (tx_id, vault_id)
-    if key in vault_deposit_queue_keys:
-        print(f"[vault-deposit-queue] already queued: {tx_id} {vault_id}")
+    if key in _completed_deposits:
+        if done_websocket:
+            await done_websocket.send_json({"message": "already_completed"})
+        return True, "already completed"
+    if key in vault_deposit_entries:
+        logger.info("already queued: %s %s", tx_id, vault_id)
         if done_websocket:
             await done_websocket.send_json({"message": "already_queued"})
         return True, "already queued"
+    if vault_deposit_backlog_size() >= settings.VAULT_DEPOSIT_QUEUE_MAX:
+        logger.warning("queue full, rejecting %s %s", tx_id, vault_id)
+        return False, "server busy, retry later"
 
     loop = asyncio.get_running_loop()
     status = await loop.run_in_executor(
-        None, _ensure_vault_log_pending, tx_id, wallet_address, vault_id
+        db_pool, _ensure_vault_log_pending, tx_id, wallet_address, vault_id
     )
     if status == "completed":
+        _remember_completed_deposit(key)
         if done_websocket:
             await done_websocket.send_json({"message": "already_completed"})
         return True, "already completed"
@@ -109,20 +148,35 @@ async def queue_vault_deposit_request(
     if vault_info.state != "deposit":
         return False, "vault is not in deposit state"
     # status == "inserted": only add to process queue when not already in DB/queue
-    vault_deposit_queue_keys.add(key)
+    if key in vault_deposit_entries:
+        # A concurrent submit of the same tx got here first
+        if done_websocket:
+            await done_websocket.send_json({"message": "already_queued"})
+        return True, "already queued"
+    if vault_deposit_backlog_size() >= settings.VAULT_DEPOSIT_QUEUE_MAX:
+        # Filled up while we were awaiting the DB; the pending row is reset on resubmit
+        logger.warning("queue full, rejecting %s %s", tx_id, vault_id)
+        return False, "server busy, retry later"
+    entry = VaultDepositQueueEntry(received_at=time.time(), websocket=done_websocket)
+    vault_deposit_entries[key] = entry
     if done_websocket is not None:
-        register_vault_deposit_done_callback(tx_id, vault_id, done_websocket)
         await done_websocket.send_json({"message": "accepted"})
-    await vault_deposit_queue.put((tx_id, wallet_address, vault_id, time.time()))
-    queue_size = vault_deposit_queue.qsize()
+    _enqueue_vault_deposit((tx_id, wallet_address, vault_id, entry.received_at))
+    queue_size = vault_deposit_backlog_size()
     if queue_size >= VAULT_DEPOSIT_WARN_THRESHOLD:
-        print(
-            f"[vault-deposit-queue] warning: queue size {queue_size} exceeds threshold"
-        )
+        logger.warning("queue size %d exceeds threshold", queue_size)
     await _ensure_vault_deposit_worker()
     return True, "queued"
 
 
+def _remember_completed_deposit(key: Tuple[str, str]) -> None:
+    """Record a completed deposit, evicting the oldest entry when the cache is full."""
+    _completed_deposits[key] = None
+    _completed_deposits.move_to_end(key)
+    if len(_completed_deposits) > VAULT_DEPOSIT_COMPLETED_CACHE_SIZE:
+        _completed_deposits.popitem(last=False)
+
+
 def _ensure_vault_log_pending(tx_id: str, wallet_address: str, vault_id: str) -> str:
     """
     Insert a pending vault log or return status if already in DB.
@@ -131,93 +185,160 @@ def _ensure_vault_log_pending(tx_id: str, wallet_address: str, vault_id: str) ->
       - "already_pending": row exists with status pending (do not queue; already in queue or processing)
       - "inserted": new row created (caller may add to queue)
     """
-    db = SessionLocal()
-    try:
-        row = (
-            db.query(VaultLog)
+    now = int(time.time())
+    with SessionLocal() as db:
+        # Reset an existing failed/pending row back to pending in one statement;
+        # a completed row fails the WHERE and is left alone
+        reset = db.execute(
+            update(VaultLog)
+            .where(
+                VaultLog.txn == tx_id,
+                VaultLog.vault_id == vault_id,
+                VaultLog.status != "completed",
+            )
+            .values(
+                {
+                    VaultLog.status: "pending",
+                    VaultLog.amount: 0.0,
+                    VaultLog.token_id: "",
+                    VaultLog.timestamp: now,
+                    VaultLog.fee: 0.0,
+                    VaultLog.extra: None,
+                    VaultLog.wallet_address: wallet_address,
+                }
+            )
+            .returning(VaultLog.id)
+        ).first()
+        if reset:
+            db.commit()
+            return "inserted"
+
+        # vault_logs has no unique index on (txn, vault_id), so ON CONFLICT
+        # cannot be used; any row left at this point is a completed one
+        completed = (
+            db.query(VaultLog.id)
             .filter(VaultLog.txn == tx_id, VaultLog.vault_id == vault_id)
             .first()
         )
-        now = int(time.time())
-        if row:
-            if row.status == "completed":
-                return "completed"
-            # if row.status == "pending":
-            #     return "already_pending"
-            # e.g. "failed" or other: refresh and allow re-queue
-            row.status = "pending"
-            row.amount = 0.0
-            row.token_id = ""
-            row.timestamp = now
-            row.fee = 0.0
-            row.extra = None
-            row.wallet_address = wallet_address
-            db.commit()
-            return "inserted"
+        if completed:
+            db.rollback()
+            return "completed"
 
-        new_row = VaultLog(
-            vault_id=vault_id,
-            wallet_address=wallet_address,
-            action="deposit",
-            amount=0.0,
-            token_id="",  # placeholder until confirmed on-chain; DB has NOT NULL
-            txn=tx_id,
-            timestamp=now,
-            status="pending",
-            fee=0.0,
-            extra=None,
+        db.add(
+            VaultLog(
+                vault_id=vault_id,
+                wallet_address=wallet_address,
+                action="deposit",
+                amount=0.0,
+                token_id="",  # placeholder until confirmed on-chain; DB has NOT NULL
+                txn=tx_id,
+                timestamp=now,
+                status="pending",
+                fee=0.0,
+                extra=None,
+            )
         )
-        db.add(new_row)
         db.commit()
-        return "inserted"
-    finally:
-        db.close()
+    return "inserted"
+
+
+def vault_deposit_backlog_size() -> int:
+    """Number of deposits waiting for a worker, across all vaults."""
+    return sum(len(backlog) for backlog in vault_deposit_backlogs.values())
+
+
+def _enqueue_vault_deposit(item: VaultDepositItem, front: bool = False) -> None:
+    """Add a deposit to its vault's backlog (back, or head if *front*) and wake a worker."""
+    vault_id = item[2]
+    backlog = vault_deposit_backlogs.get(vault_id)
+    if backlog is None:
+        backlog = vault_deposit_backlogs[vault_id] = deque()
+    if front:
+        backlog.appendleft(item)
+    else:
+        backlog.append(item)
+    _vault_deposit_ready.set()
+
+
+async def _next_vault_deposit() -> VaultDepositItem:
+    """Take the head deposit of the next vault in round-robin order."""
+    while not vault_deposit_backlogs:
+        _vault_deposit_ready.clear()
+        await _vault_deposit_ready.wait()
+    vault_id, backlog = vault_deposit_backlogs.popitem(last=False)
+    item = backlog.popleft()
+    if backlog:
+        # Rotate the vault to the back so every other vault gets a turn first
+        vault_deposit_backlogs[vault_id] = backlog
+    return item
 
 
 async def _ensure_vault_deposit_worker() -> None:
-    """Ensure the background worker is running."""
-    global vault_deposit_worker_task
-    if vault_deposit_worker_task is None or vault_deposit_worker_task.done():
-        vault_deposit_worker_task = asyncio.create_task(_vault_deposit_worker())
-        print("[vault-deposit-queue] worker started")
+    """Top the worker pool back up to VAULT_DEPOSIT_WORKER_COUNT consumers."""
+    global vault_deposit_worker_tasks
+    vault_deposit_worker_tasks = [
+        task for task in vault_deposit_worker_tasks if not task.done()
+    ]
+    missing = settings.VAULT_DEPOSIT_WORKER_COUNT - len(vault_deposit_worker_tasks)
+    for _ in range(missing):
+        vault_deposit_worker_tasks.append(asyncio.create_task(_vault_deposit_worker()))
+    if missing > 0:
+        logger.info("started %d worker(s)", missing)
 
 
 async def _vault_deposit_worker() -> None:
-    global vault_deposit_worker_task, vault_deposit_queue_keys
-    
+    """Consume the per-vault backlogs; workers wait while they are all empty."""
     while True:
-        try:
-            tx_id, wallet_address, vault_id, received_at = (
-                vault_deposit_queue.get_nowait()
-            )
-        except asyncio.QueueEmpty:
-            vault_deposit_worker_task = None
-            print("[vault-deposit-queue] idle, stopping worker")
-            return
+        tx_id, wallet_address, vault_id, received_at = await _next_vault_deposit()
 
         key = (tx_id, vault_id)
+        entry = vault_deposit_entries.get(key)
+        if entry is not None:
+            entry.state = "processing"
+        retrying = False
         try:
             success = await _process_vault_deposit_item(
                 tx_id, wallet_address, vault_id, received_at
             )
-        finally:
-            vault_deposit_queue.task_done()
-            vault_deposit_queue_keys.discard(key)
-
-        if not success:
+            if success:
+                continue
             age = time.time() - received_at
             if age <= VAULT_DEPOSIT_RETRY_MAX_AGE_SECONDS:
-                vault_deposit_queue_keys.add(key)
-                await vault_deposit_queue.put((tx_id, wallet_address, vault_id, received_at))
-                print(f"[vault-deposit-queue] requeue {tx_id} (age={age:.1f}s), sleeping {VAULT_DEPOSIT_RETRY_SLEEP_SECONDS}s")
-                await asyncio.sleep(VAULT_DEPOSIT_RETRY_SLEEP_SECONDS)
-                print(f"[vault-deposit-queue] requeued {tx_id} (age={age:.1f}s)")
+                # Keep the entry while it waits so the tx is not queued twice
+                retrying = True
+                if entry is not None:
+                    entry.state = "retrying"
+                task = asyncio.create_task(
+                    _delayed_requeue(
+                        (tx_id, wallet_address, vault_id, received_at),
+                        VAULT_DEPOSIT_RETRY_SLEEP_SECONDS,
+                    )
+                )
+                _vault_deposit_retry_tasks.add(task)
+                task.add_done_callback(_vault_deposit_retry_tasks.discard)
+                logger.info(
+                    "requeue %s (age=%.1fs) in %ss", tx_id, age, VAULT_DEPOSIT_RETRY_SLEEP_SECONDS
+                )
                 continue
             loop = asyncio.get_running_loop()
-            await loop.run_in_executor(
-                None, _mark_vault_log_failed, tx_id, vault_id, "stale"
-            )
+            await loop.run_in_executor(db_pool, _mark_vault_log_stale, tx_id, vault_id)
             send_vault_deposit_done_result(tx_id, vault_id, "failed", "stale")
+        finally:
+            # Terminal outcome: drop the entry even if no result was sent
+            if not retrying:
+                vault_deposit_entries.pop(key, None)
+
+
+async def _delayed_requeue(item: VaultDepositItem, delay: float) -> None:
+    """Put a deposit back at the head of its vault's backlog after *delay* without holding a worker."""
+    await asyncio.sleep(delay)
+    entry = vault_deposit_entries.get((item[0], item[2]))
+    if entry is not None:
+        entry.state = "queued"
+    # It already waited out the backoff and is the oldest deposit for its vault,
+    # so it goes ahead of newer submissions rather than behind them
+    _enqueue_vault_deposit(item, front=True)
+    await _ensure_vault_deposit_worker()
 
 
 async def _process_vault_deposit_item(
@@ -225,85 +346,151 @@ async def _process_vault_deposit_item(
 ) -> bool:
     """Return True if processed (success or permanent failure), False to retry."""
     loop = asyncio.get_running_loop()
+    # One session per deposit, shared by validation, finalization and failure marking
+    db = SessionLocal()
+    cache_key = (tx_id, vault_id, wallet_address)
+    now = int(time.time())  # one clock read for every timestamp this attempt writes
     try:
-        chain_info = await loop.run_in_executor(
-            None, _validate_vault_deposit_onchain, tx_id, wallet_address, vault_id
-        )
+        chain_info = _chain_info_cache.get(cache_key)
+        if chain_info is None:
+            utxos, tx = await _fetch_tx_bundle(tx_id)
+            chain_info = await loop.run_in_executor(
+                db_pool,
+                _validate_vault_deposit_onchain,
+                db,
+                tx_id,
+                wallet_address,
+                vault_id,
+                utxos,
+                tx,
+                now,
+            )
+            _chain_info_cache[cache_key] = chain_info
         await loop.run_in_executor(
-            None,
+            db_pool,
             _finalize_vault_deposit,
+            db,
             tx_id,
             wallet_address,
             vault_id,
             chain_info,
+            now,
         )
-        print(f"[vault-deposit-queue] processed {tx_id} for vault {vault_id}")
+        _chain_info_cache.pop(cache_key)
+        _remember_completed_deposit((tx_id, vault_id))
+        logger.info("processed %s for vault %s", tx_id, vault_id)
         send_vault_deposit_done_result(
             tx_id, vault_id, "oke", data={"depositAmount": chain_info.amount}
         )
         return True
     except VaultDepositRetryableError as e:
-        print(f"[vault-deposit-queue] will retry {tx_id}: {e}")
+        logger.info("will retry %s: %s", tx_id, e)
         return False
     except Exception as e:
-        print(f"[vault-deposit-queue] error processing {tx_id}: {e}")
+        logger.error("error processing %s: %s", tx_id, e)
         await loop.run_in_executor(
-            None, _mark_vault_log_failed, tx_id, vault_id, str(e)
+            db_pool, _mark_vault_log_failed, db, tx_id, vault_id, str(e)
         )
         send_vault_deposit_done_result(tx_id, vault_id, "failed", str(e))
         return True
+    finally:
+        db.close()
+
+
+@lru_cache(maxsize=1024)
+def _decode_constr(raw: bytes) -> Tuple[int, Tuple[Any, ...]]:
+    """Decode a Plutus Constr datum straight from CBOR into (constructor, fields)."""
+    tag = cbor2.loads(raw)
+    if not isinstance(tag, cbor2.CBORTag):
+        raise ValueError("datum is not a Plutus Constr")
+    if 121 <= tag.tag <= 127:
+        constructor, fields = tag.tag - 121, tag.value
+    elif 1280 <= tag.tag <= 1400:
+        constructor, fields = tag.tag - 1280 + 7, tag.value
+    elif tag.tag == 102:
+        constructor, fields = tag.value
+    else:
+        raise ValueError(f"unexpected datum tag: {tag.tag}")
+    return constructor, tuple(fields)
 
-# todo: optimize skip decoded.value, from raw to fields and normalize
-def _parse_datum(datum_cbor: bytes=None, datum_hex: str=None) -> Tuple[int, List[any]]:
+
+def _parse_datum(datum_cbor: bytes = None, datum_hex: str = None) -> Dict[str, Any]:
     """
     Parse vault deposit datum CBOR.
     Expected: Constr 0 with fields [hash (28 bytes), pool_asset (policy_id + pool_name as bytes)].
     Raw hex decodes as tag 121 (Constr) then either:
       - [field0, field1] (two byte strings), or
       - [constructor_index, [field0, field1]].
-    Returns (constructor, list of field bytes).
+    Returns {"constructor": int, "fields": tuple with byte fields left as raw bytes}.
     """
-    if datum_hex:
-        datum = RawPlutusData.from_cbor(bytes.fromhex(datum_hex)).to_dict()
-    else:
-        datum = RawPlutusData.from_cbor(datum_cbor).to_dict()
-
-    if not datum["fields"]:
+    raw = bytes.fromhex(datum_hex) if datum_hex else datum_cbor
+    constructor, fields = _decode_constr(raw)
+    if not fields:
         raise ValueError("datum has no fields")
-
-    fields = []
-    for field in datum["fields"]:
-        for k, v in field.items():
-            # if k == 'bytes':
-            fields.append(v)
-            break
     return {
-        "constructor": datum["constructor"],
-        "fields": fields
+        "constructor": constructor,
+        # The memoized tuple is immutable, so it is shared rather than copied
+        "fields": fields,
     }
 
 
-def _validate_vault_deposit_onchain(
-    tx_id: str, wallet_address: str, vault_id: str
-) -> VaultDepositChainInfo:
-    """Fetch the transaction and ensure datum (address hash + pool_name) match expectations."""
-    db = SessionLocal()
+@lru_cache(maxsize=4096)
+def _wallet_key_hashes(wallet_address: str) -> Optional[bytes]:
+    """Payment (+ staking) key hash bytes of a wallet, as the deposit datum stores them."""
     try:
-        deployment = get_vault_deployment_info(db, vault_id)
-    finally:
-        db.close()
+        address = Address.from_primitive(wallet_address)
+    except Exception:
+        return None
+    if address.network != settings.CARDANO_NETWORK:
+        return None
+    parts = [address.payment_part, address.staking_part]
+    return b"".join(part.payload for part in parts if part is not None)
 
-    if not deployment:
-        raise ValueError("vault deployment info missing")
 
+@lru_cache(maxsize=1024)
+def _pool_name_bytes(pool_name: Optional[str]) -> Optional[bytes]:
+    """Decode a deployment's hex pool_name once for comparison against datum bytes."""
     try:
-        utxos = context.api.transaction_utxos(tx_id)
-        tx = context.api.transaction(tx_id)
+        return bytes.fromhex((pool_name or "").strip())
+    except ValueError:
+        return None
+
+
+async def _fetch_tx_bundle(tx_id: str) -> Tuple[Namespace, Namespace]:
+    """Fetch a transaction's UTxOs and body from Blockfrost concurrently.
+
+    Both calls go through the SDK, whose HTTP is pooled by setup_blockfrost_http().
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        utxos, tx = await asyncio.gather(
+            loop.run_in_executor(blockfrost_pool, context.api.transaction_utxos, tx_id),
+            loop.run_in_executor(blockfrost_pool, context.api.transaction, tx_id),
+        )
     except ApiError as exc:
         status = getattr(exc, "status_code", None)
         if status == 404:
             raise VaultDepositRetryableError("transaction not found yet") from exc
         raise
+    # The SDK annotates its endpoints as returning Response, but the default
+    # return_type gives back the parsed Namespace
+    return cast(Namespace, utxos), cast(Namespace, tx)
+
+
+def _validate_vault_deposit_onchain(
+    db: Session,
+    tx_id: str,
+    wallet_address: str,
+    vault_id: str,
+    utxos: Namespace,
+    tx: Namespace,
+    now: int,
+) -> VaultDepositChainInfo:
+    """Ensure the fetched transaction's datum (address hash + pool_name) match expectations."""
+    deployment = get_vault_deployment_info(db, vault_id)
+
+    if not deployment:
+        raise ValueError("vault deployment info missing")
 
     vault_output: Optional[Namespace] = None
     for output in utxos.outputs:
@@ -318,7 +505,7 @@ def _validate_vault_deposit_onchain(
     # is depositing into. Deposit asset is always ADA (lovelace).
     lovelace_amount = 0.0
     # policy_id = deployment.factory_policy_id or ""
-    expected_pool_name = (deployment.pool_name or "").strip().lower()
+    expected_pool_name = _pool_name_bytes(deployment.pool_name)
 
     for entry in vault_output.amount:
         unit = entry.unit
@@ -338,113 +525,142 @@ def _validate_vault_deposit_onchain(
     if len(fields) < 2:
         raise ValueError("invalid datum shape; expected Constr 0 with two fields")
     datum_user_hash = fields[0]
+    datum_user_address = None
     datum_pool_name = fields[1]
-    try:
-        if len(datum_user_hash) == 56:
-            payment_part = hash.VerificationKeyHash.from_primitive(datum_user_hash)
-            staking_part = None
-        elif len(datum_user_hash) == 112:
-            payment_part = hash.VerificationKeyHash.from_primitive(datum_user_hash[:56])
-            staking_part = hash.VerificationKeyHash.from_primitive(datum_user_hash[56:])
-        else:
-            raise ValueError(f"invalid datum_user_hash length: {len(datum_user_hash)}")
-
-        datum_user_address = str(
-            Address(
-                payment_part=payment_part,
-                staking_part=staking_part,
-                network=settings.CARDANO_NETWORK,
+    if datum_user_hash == _wallet_key_hashes(wallet_address):
+        # Datum holds this wallet's key hashes; the address is the wallet itself
+        datum_user_address = wallet_address.lower()
+    else:
+        try:
+            if len(datum_user_hash) == 28:
+                payment_part = hash.VerificationKeyHash(datum_user_hash)
+                staking_part = None
+            elif len(datum_user_hash) == 56:
+                payment_part = hash.VerificationKeyHash(datum_user_hash[:28])
+                staking_part = hash.VerificationKeyHash(datum_user_hash[28:])
+            else:
+                raise ValueError(f"invalid datum_user_hash length: {len(datum_user_hash)}")
+
+            datum_user_address = str(
+                Address(
+                    payment_part=payment_part,
+                    staking_part=staking_part,
+                    network=settings.CARDANO_NETWORK,
+                )
             )
-        )
-    except Exception as e:
-        print(f"[vault-deposit-queue] _validate_vault_deposit_onchain: {e}")
-        raise ValueError(f"invalid user hash in datum") from e
-
-    if datum_user_address != wallet_address.lower():
-        print(f"user hash mismatch in datum; expected user hash from wallet address. Expected: {wallet_address}, Actual: {datum_user_address}")
-    if datum_pool_name != expected_pool_name:
-        raise ValueError(f"pool_name mismatch in datum; expected pool_name from vault deployment, Expected: {expected_pool_name}, Actual: {datum_pool_name}")
+        except Exception as e:
+            logger.warning("invalid user hash in datum for %s: %s", tx_id, e)
+            raise ValueError("invalid user hash in datum") from e
+
+        if datum_user_address != wallet_address.lower():
+            logger.warning(
+                "user hash mismatch in datum for %s; expected %s, got %s",
+                tx_id,
+                wallet_address,
+                datum_user_address,
+            )
+    if expected_pool_name is None or datum_pool_name != expected_pool_name:
+        actual = datum_pool_name.hex() if isinstance(datum_pool_name, bytes) else datum_pool_name
+        raise ValueError(f"pool_name mismatch in datum; expected pool_name from vault deployment, Expected: {deployment.pool_name}, Actual: {actual}")
 
     fee = float(getattr(tx, "fee", getattr(tx, "fees", 0))) / 1_000_000
     # Deposit asset is always ADA (lovelace); vault NFT above only identifies which vault
     return VaultDepositChainInfo(
         amount=lovelace_amount,
         token_id="lovelace",
-        timestamp=int(tx.block_time or time.time()),
+        timestamp=int(tx.block_time or now),
         fee=fee,
-        pool_name=datum_pool_name,
+        pool_name=datum_pool_name.hex(),
         contributor_address=datum_user_address,
     )
 
 
 def _finalize_vault_deposit(
+    db: Session,
     tx_id: str,
     wallet_address: str,
     vault_id: str,
     chain_info: VaultDepositChainInfo,
+    now: int,
 ) -> None:
     """Mark the vault log as completed and bump user earnings."""
-    db = SessionLocal()
-    try:
-        row = (
-            db.query(VaultLog)
-            .filter(VaultLog.txn == tx_id, VaultLog.vault_id == vault_id)
-            .first()
+    contributor_address = chain_info.contributor_address
+    completed = db.execute(
+        update(VaultLog)
+        .where(VaultLog.txn == tx_id, VaultLog.vault_id == vault_id)
+        .values(
+            {
+                VaultLog.wallet_address: contributor_address,
+                VaultLog.amount: chain_info.amount,
+                VaultLog.token_id: chain_info.token_id,
+                VaultLog.timestamp: chain_info.timestamp,
+                VaultLog.status: "completed",
+                VaultLog.fee: chain_info.fee,
+                VaultLog.extra: None,
+            }
         )
-
-        if not row:
-            return
-
-        contributor_address = chain_info.contributor_address
-        if row.wallet_address != contributor_address:
-            row.wallet_address = contributor_address
-        row.amount = chain_info.amount
-        row.token_id = chain_info.token_id
-        row.timestamp = chain_info.timestamp
-        row.status = "completed"
-        row.fee = chain_info.fee
-        row.extra = None
-
-        earning = (
-            db.query(UserEarning)
-            .filter(
-                UserEarning.vault_id == vault_id,
-                UserEarning.wallet_address == contributor_address,
+        .returning(VaultLog.id)
+    ).first()
+    if not completed:
+        db.rollback()
+        return
+
+    # Increment the earnings row server-side so concurrent deposits for the same
+    # wallet add up without a read-modify-write race. user_earnings has no unique
+    # index on (vault_id, wallet_address), so a missing row is inserted separately;
+    # the transaction-scoped advisory lock keeps two first deposits for the same
+    # wallet from both inserting one
+    db.execute(
+        select(
+            func.pg_advisory_xact_lock(
+                func.hashtext(f"user_earnings:{vault_id}:{contributor_address}")
             )
-            .first()
         )
-        if not earning:
-            earning = UserEarning(
+    )
+    credited = db.execute(
+        update(UserEarning)
+        .where(
+            UserEarning.vault_id == vault_id,
+            UserEarning.wallet_address == contributor_address,
+        )
+        .values(
+            {
+                UserEarning.total_deposit: func.coalesce(UserEarning.total_deposit, 0.0)
+                + chain_info.amount,
+                UserEarning.current_value: func.coalesce(UserEarning.current_value, 0.0)
+                + chain_info.amount,
+                UserEarning.last_updated_timestamp: now,
+            }
+        )
+        .returning(UserEarning.id)
+    ).first()
+    if not credited:
+        db.add(
+            UserEarning(
                 vault_id=vault_id,
                 wallet_address=contributor_address,
                 total_deposit=chain_info.amount,
                 total_withdrawal=0.0,
                 current_value=chain_info.amount,
-                last_updated_timestamp=int(time.time()),
+                last_updated_timestamp=now,
             )
-            db.add(earning)
-        else:
-            earning.total_deposit = (earning.total_deposit or 0.0) + chain_info.amount
-            earning.current_value = (earning.current_value or 0.0) + chain_info.amount
-            earning.last_updated_timestamp = int(time.time())
-        db.commit()
-    finally:
-        db.close()
+        )
+    db.commit()
 
 
-def _mark_vault_log_failed(tx_id: str, vault_id: str, reason: str) -> None:
+def _mark_vault_log_failed(db: Session, tx_id: str, vault_id: str, reason: str) -> None:
     """Mark a pending vault log as failed with optional metadata reason."""
-    db = SessionLocal()
-    try:
-        row = (
-            db.query(VaultLog)
-            .filter(VaultLog.txn == tx_id, VaultLog.vault_id == vault_id)
-            .first()
-        )
-        if not row:
-            return
-        row.status = "failed"
-        row.extra = {"reason": reason}
-        db.commit()
-    finally:
-        db.close()
+    # The session may hold a transaction aborted by the error being recorded
+    db.rollback()
+    db.execute(
+        update(VaultLog)
+        .where(VaultLog.txn == tx_id, VaultLog.vault_id == vault_id)
+        .values({VaultLog.status: "failed", VaultLog.extra: {"reason": reason}})
+    )
+    db.commit()
+
+
+def _mark_vault_log_stale(tx_id: str, vault_id: str) -> None:
+    """Mark a deposit that ran out of retries as failed, in its own session."""
+    with SessionLocal() as db:
+        _mark_vault_log_failed(db, tx_id, vault_id, "stale")
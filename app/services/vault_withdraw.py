@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from decimal import Decimal, InvalidOperation
 from typing import Optional
+import math
 import time
 
 from sqlalchemy import func
@@ -8,7 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.models.vault import UserEarning, VaultConfigUtxo
 from app.services.onchain_process import vault_withdraw_on_chain
-from app.services.vault_deployment import get_vault_deployment_info
+from app.services.vault_deployment import get_vault_deployment_info, invalidate_vault
 
 
 @dataclass
@@ -23,6 +24,15 @@ def _normalize_address(address: str) -> str:
 
 
 def _ada_to_lovelace(amount_ada: float) -> int:
+    if isinstance(amount_ada, float):
+        # Amounts read from the DB are floats: skip the str/Decimal round-trip.
+        # Rounding to 1/1000 lovelace drops float noise (0.29 * 1e6 = 289999.99...)
+        # before truncating, which is what Decimal(str(x)) did
+        if not (amount_ada > 0 and math.isfinite(amount_ada)):
+            return 0
+        return math.floor(round(amount_ada * 1_000_000, 3))
+    if isinstance(amount_ada, int):
+        return amount_ada * 1_000_000 if amount_ada > 0 else 0
     try:
         ada_decimal = Decimal(str(amount_ada))
     except InvalidOperation:
@@ -46,7 +56,8 @@ def perform_vault_withdraw(
     wallet = _normalize_address(wallet_address)
     if not vault_id or not wallet:
         return VaultWithdrawOutcome(error="vault_id and wallet_address are required")
-    deployment = get_vault_deployment_info(db, vault_id)
+    # The config UTxO is spent below, so never use a cached reference
+    deployment = get_vault_deployment_info(db, vault_id, fresh=True)
     if not deployment or not deployment.config_utxo_tx_id:
         return VaultWithdrawOutcome(error="vault deployment info is incomplete")
     manager_pkh = deployment.manager_pkh
@@ -109,5 +120,6 @@ def perform_vault_withdraw(
         earning.is_redeemed = True
     earning.last_updated_timestamp = int(time.time())
     db.commit()
+    invalidate_vault(vault_id)
 
     return VaultWithdrawOutcome(tx_hash=chain_result.tx_hash, message=f"withdrawn {target_ada} ADA")
@@ -8,29 +8,46 @@ Only the **manager** signs; the recipient (B) does not sign.
 Manager wallet is resolved via ``get_manager_wallet(pkh)``.
 """
 
-from cmath import phase
+import asyncio
 import logging
+import re
+import time
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Optional, Tuple, cast
 
+import cbor2
+from blockfrost.utils import ApiError, Namespace
 from pycardano import (
     Address as CardanoAddress,
+    Asset,
+    AssetName,
     BlockFrostChainContext,
-    Network,
+    DatumHash,
+    MultiAsset,
+    NativeScript,
     PaymentSigningKey,
     PlutusData,
+    PlutusScript,
     PlutusV3Script,
-    RawPlutusData,
+    ProtocolParameters,
+    RawCBOR,
     Redeemer,
+    SCRIPT_HASH_SIZE,
+    ScriptHash,
+    ScriptType,
     TransactionBuilder,
+    TransactionInput,
     TransactionOutput,
     UTxO,
     Value,
+    script_hash,
 )
 
-from app.core.config import settings
+from app.core.executors import blockfrost_pool
 from app.services.manager_wallet import get_manager_wallet
 from app.services.contract_scripts import load_contract_script
+from app.services.onchain_process import context as shared_chain_context
 
 logger = logging.getLogger(__name__)
 
@@ -38,20 +55,70 @@ logger = logging.getLogger(__name__)
 # Blockfrost chain context
 # ---------------------------------------------------------------------------
 
-BLOCKFROST_ENDPOINTS = {
-    Network.MAINNET: "https://cardano-mainnet.blockfrost.io/api/",
-    Network.TESTNET: "https://cardano-preprod.blockfrost.io/api/",
-}
+
+# validity_start only needs a recent slot, so the tip is reused for a few
+# seconds (about one block) instead of being fetched per withdraw
+CHAIN_TIP_CACHE_TTL_SECONDS = 20
+_chain_tip: Optional[Tuple[float, int]] = None  # (expires_at monotonic, slot)
+
+# Background refresh keeps the tip (and protocol params) warm so withdraws never
+# wait on them; the interval stays under the tip TTL
+CHAIN_STATE_REFRESH_SECONDS = 10
+_chain_refresh_task: Optional[asyncio.Task] = None
 
 
 def _get_chain_context() -> BlockFrostChainContext:
-    return BlockFrostChainContext(
-        project_id=settings.BLOCKFROST_API_KEY,
-        base_url=BLOCKFROST_ENDPOINTS.get(
-            settings.CARDANO_NETWORK,
-            BLOCKFROST_ENDPOINTS[Network.MAINNET],
-        ),
-    )
+    # Reuse the process-wide context: a new one fetches the latest epoch on
+    # construction and re-fetches protocol params on first use
+    return shared_chain_context
+
+
+def _last_block_slot(context: BlockFrostChainContext) -> int:
+    global _chain_tip
+    now = time.monotonic()
+    tip = _chain_tip
+    if tip is None or tip[0] <= now:
+        tip = (now + CHAIN_TIP_CACHE_TTL_SECONDS, context.last_block_slot)
+        _chain_tip = tip
+    return tip[1]
+
+
+def _protocol_param(context: BlockFrostChainContext) -> ProtocolParameters:
+    # pycardano re-fetches protocol params only when the epoch rolls over
+    return context.protocol_param
+
+
+def _refresh_chain_state() -> None:
+    global _chain_tip
+    context = _get_chain_context()
+    slot = context.last_block_slot
+    _chain_tip = (time.monotonic() + CHAIN_TIP_CACHE_TTL_SECONDS, slot)
+    _protocol_param(context)
+
+
+async def _chain_state_refresh_loop() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(blockfrost_pool, _refresh_chain_state)
+        except Exception as exc:
+            logger.warning("chain state refresh failed: %s", exc)
+        await asyncio.sleep(CHAIN_STATE_REFRESH_SECONDS)
+
+
+def start_chain_state_refresh() -> None:
+    """Start the background chain tip / protocol params refresh task."""
+    global _chain_refresh_task
+    if _chain_refresh_task is None or _chain_refresh_task.done():
+        _chain_refresh_task = asyncio.create_task(_chain_state_refresh_loop())
+
+
+def stop_chain_state_refresh() -> None:
+    """Cancel the background refresh task."""
+    global _chain_refresh_task
+    if _chain_refresh_task is not None:
+        _chain_refresh_task.cancel()
+        _chain_refresh_task = None
 
 
 # ---------------------------------------------------------------------------
@@ -60,8 +127,11 @@ def _get_chain_context() -> BlockFrostChainContext:
 
 TAG_WITHDRAW = 8
 
+# Ellipsis left behind when a UI shortens an address for display
+_TRUNCATED_ADDRESS = re.compile(r"\u2026|\.\.\.")
 
-@dataclass
+
+@dataclass(slots=True)
 class VaultConfigDatum(PlutusData):
     state: int  # 0: Open, 1: Trading, 2: Withdrawable, 3: Closed
     manager: bytes
@@ -74,7 +144,7 @@ class VaultConfigDatum(PlutusData):
     pmv: int # post_money_value (Snapshot of tracked asset amount)
 
 
-@dataclass
+@dataclass(slots=True)
 class VaultRedeemer(PlutusData):
     tag: int = 0
     i1: int = 0
@@ -84,6 +154,10 @@ class VaultRedeemer(PlutusData):
     b2: bytes = b""
 
 
+# Withdraw redeemer payload is constant; built once at import
+_WITHDRAW_REDEEMER_DATA = VaultRedeemer(tag=TAG_WITHDRAW)
+
+
 # ---------------------------------------------------------------------------
 # Helpers (from vault_client.py)
 # ---------------------------------------------------------------------------
@@ -95,10 +169,64 @@ def _canonicalize_hex(value: str) -> str:
     return value.lower()
 
 
+@lru_cache(maxsize=256)
+def _parse_address(address: str) -> CardanoAddress:
+    """Decode a Bech32 address once; vault and recipient addresses repeat across withdraws."""
+    return CardanoAddress.from_primitive(address)
+
+
 def _extract_bytes(key) -> bytes:
     return getattr(key, "payload", key)
 
 
+def _reference_script(context: BlockFrostChainContext, ref_script_hash: str) -> ScriptType:
+    """Fetch a reference script by hash through the public Blockfrost endpoints."""
+    script_type = cast(Namespace, context.api.script(ref_script_hash)).type
+    if not script_type.lower().startswith("plutusv"):
+        script_json = cast(dict, context.api.script_json(ref_script_hash, return_type="json"))
+        return NativeScript.from_dict(script_json["json"])
+
+    cbor_hex = cast(Namespace, context.api.script_cbor(ref_script_hash)).cbor
+    script = PlutusScript.from_version(int(script_type[-1]), bytes.fromhex(cbor_hex))
+    if str(script_hash(script)) != ref_script_hash:
+        # Blockfrost sometimes returns the script wrapped in an extra CBOR bytestring
+        script = script.__class__(cbor2.loads(script))
+        if str(script_hash(script)) != ref_script_hash:
+            raise ValueError(f"Cannot recover reference script {ref_script_hash}")
+    return script
+
+
+def _utxo_from_tx_output(
+    context: BlockFrostChainContext, tx_id: str, output: Namespace
+) -> UTxO:
+    """Build a ``UTxO`` from a ``/txs/{hash}/utxos`` output, as pycardano does for address UTxOs."""
+    lovelace = 0
+    assets: dict[ScriptHash, Asset] = {}
+    for item in output.amount:
+        if item.unit == "lovelace":
+            lovelace = int(item.quantity)
+            continue
+        data = bytes.fromhex(item.unit)
+        policy_id = ScriptHash(data[:SCRIPT_HASH_SIZE])
+        if policy_id not in assets:
+            assets[policy_id] = Asset()
+        assets[policy_id][AssetName(data[SCRIPT_HASH_SIZE:])] = int(item.quantity)
+
+    inline_datum = getattr(output, "inline_datum", None)
+    data_hash = getattr(output, "data_hash", None)
+    ref_script_hash = getattr(output, "reference_script_hash", None)
+    return UTxO(
+        TransactionInput.from_primitive([tx_id, output.output_index]),
+        TransactionOutput(
+            CardanoAddress.from_primitive(output.address),
+            amount=Value(lovelace, MultiAsset(assets)),
+            datum_hash=DatumHash.from_primitive(data_hash) if data_hash and inline_datum is None else None,
+            datum=RawCBOR(bytes.fromhex(inline_datum)) if inline_datum is not None else None,
+            script=_reference_script(context, ref_script_hash) if ref_script_hash else None,
+        ),
+    )
+
+
 def get_utxo_by_ref(
     context: BlockFrostChainContext,
     tx_id: str,
@@ -107,10 +235,28 @@ def get_utxo_by_ref(
 ) -> UTxO:
     """Locate a live UTxO by transaction hash and output index."""
     canonical = _canonicalize_hex(tx_id)
+    # One request for the producing tx's outputs instead of paging every UTxO
+    # at the search addresses
+    try:
+        tx_utxos = cast(Namespace, context.api.transaction_utxos(canonical))
+    except ApiError as exc:
+        if exc.status_code != 404:
+            raise
+        tx_utxos = None
+    if tx_utxos is not None:
+        allowed = {str(address) for address in search_addresses}
+        for output in tx_utxos.outputs:
+            if output.output_index != index or getattr(output, "collateral", False):
+                continue
+            if output.address not in allowed or getattr(output, "consumed_by_tx", None):
+                break
+            return _utxo_from_tx_output(context, canonical, output)
+        raise ValueError(f"UTxO {tx_id}#{index} not found at provided addresses")
+
+    tx_bytes = bytes.fromhex(canonical)
     for address in search_addresses:
         for utxo in context.utxos(address):
-            utxo_hash = utxo.input.transaction_id.payload.hex().lower()
-            if utxo_hash == canonical and utxo.input.index == index:
+            if utxo.input.index == index and utxo.input.transaction_id.payload == tx_bytes:
                 return utxo
     raise ValueError(f"UTxO {tx_id}#{index} not found at provided addresses")
 
@@ -134,23 +280,25 @@ def _subtract_asset(
     value: Value,
 ) -> Value:
     """Return *value* minus *qty* of the given asset."""
-    coin = value.coin - qty if policy == b"" and name == b"" else value.coin
-    raw_assets = value.multi_asset.copy() if value.multi_asset else {}
-    if policy and name:
-        remaining: dict = {}
-        for pol, amounts in raw_assets.items():
-            pol_bytes = _extract_bytes(pol)
-            remaining[pol_bytes] = {}
-            for asset_name_key, amount in amounts.items():
-                name_bytes = _extract_bytes(asset_name_key)
-                if pol_bytes == policy and name_bytes == name:
-                    amount -= qty
-                if amount > 0:
-                    remaining[pol_bytes][name_bytes] = amount
-            if not remaining[pol_bytes]:
-                del remaining[pol_bytes]
-        return Value(coin, remaining)
-    return Value(coin, raw_assets) if raw_assets else Value(coin)
+    if policy == b"" and name == b"":
+        # Lovelace only: the multi-asset part is unchanged, so share it as-is
+        coin = value.coin - qty
+        return Value(coin, value.multi_asset) if value.multi_asset else Value(coin)
+    if not (policy and name):
+        return Value(value.coin, value.multi_asset) if value.multi_asset else Value(value.coin)
+
+    remaining: dict = {}
+    for pol, amounts in (value.multi_asset or {}).items():
+        pol_bytes = _extract_bytes(pol)
+        # One pass normalizes the names; only the target policy is touched after
+        kept = {_extract_bytes(n): amount for n, amount in amounts.items() if amount > 0}
+        if pol_bytes == policy and name in kept:
+            kept[name] -= qty
+            if kept[name] <= 0:
+                del kept[name]
+        if kept:
+            remaining[pol_bytes] = kept
+    return Value(value.coin, remaining)
 
 
 # ---------------------------------------------------------------------------
@@ -165,7 +313,12 @@ def _parse_utxo_ref(ref: str) -> Tuple[str, int]:
         raise ValueError(f"UTxO ref must be 'tx_id#index', got: {ref}")
     tx_id, index_str = value.rsplit("#", 1)
     tx_id = tx_id.strip()
-    if len(tx_id) != 64 or not all(c in "0123456789abcdefABCDEF" for c in tx_id):
+    try:
+        # 64 chars decoding to 32 bytes rules out the whitespace fromhex accepts
+        valid = len(tx_id) == 64 and len(bytes.fromhex(tx_id)) == 32
+    except ValueError:
+        valid = False
+    if not valid:
         raise ValueError(f"Invalid tx_id in UTxO ref: {tx_id}")
     try:
         index = int(index_str.strip())
@@ -191,6 +344,7 @@ def _build_withdraw_tx(
     amount: int,
     manager_signing_key: PaymentSigningKey,
     manager_address: CardanoAddress,
+    validity_start: Optional[int] = None,
 ) -> str:
     """
     Build, sign and submit a withdrawal transaction.
@@ -210,25 +364,17 @@ def _build_withdraw_tx(
     # print(f"current_datum.to_dict(): {current_datum.to_dict()}")
 
     # Compute output values
-    remaining_value = _subtract_asset(b"", b"", amount, config_utxo.output.amount)
-    user_value = _asset_value(b"", b"", amount)
-
-    # Datum for the continuing vault UTxO (state preserved)
-    next_datum = VaultConfigDatum(
-        state=current_datum.state,
-        manager=current_datum.manager,
-        asset_policy=current_datum.asset_policy,
-        asset_name=current_datum.asset_name,
-        max_users=current_datum.max_users,
-        t_time=current_datum.t_time,
-        w_time=current_datum.w_time,
-        cap=current_datum.cap,
-        pmv=current_datum.pmv,
-    )
+    # Withdrawals are always lovelace: one int subtraction, assets carried over as-is
+    vault_value = config_utxo.output.amount
+    remaining_value = Value(vault_value.coin - amount, vault_value.multi_asset)
+    user_value = Value(amount)
 
-    redeemer = Redeemer(
-        VaultRedeemer(tag=TAG_WITHDRAW, i1=0, i2=0, i3=0, b1=b"", b2=b"")
-    )
+    # The continuing vault UTxO keeps the datum unchanged, so the original
+    # CBOR is passed through instead of re-encoding a copy
+    next_datum = config_utxo.output.datum
+
+    # The builder fills in tag/index/ex_units on the Redeemer, so only its data is shared
+    redeemer = Redeemer(_WITHDRAW_REDEEMER_DATA)
 
     builder = TransactionBuilder(context)
     builder.add_input_address(manager_address)
@@ -240,7 +386,9 @@ def _build_withdraw_tx(
     )
     # Output 1 — recipient receives their ADA
     builder.add_output(TransactionOutput(recipient_address, amount=user_value))
-    builder.validity_start = context.last_block_slot
+    builder.validity_start = (
+        validity_start if validity_start is not None else _last_block_slot(context)
+    )
     signed_tx = builder.build_and_sign(
         [manager_signing_key], change_address=manager_address
     )
@@ -253,7 +401,7 @@ def _build_withdraw_tx(
 # ---------------------------------------------------------------------------
 
 
-@dataclass
+@dataclass(slots=True)
 class WithdrawResult:
     """Structured result returned by ``withdraw_action``."""
 
@@ -298,13 +446,15 @@ def withdraw_action(
         Transaction hash and new config UTxO location.
     """
     # --- validate inputs ---------------------------------------------------
-    if not recipient_address or not recipient_address.strip():
+    recipient_address = (recipient_address or "").strip()
+    if not recipient_address:
         raise ValueError("recipient_address is required")
-    recipient_address = recipient_address.strip()
-    if "\u2026" in recipient_address or "..." in recipient_address:
+    if _TRUNCATED_ADDRESS.search(recipient_address):
         raise ValueError("recipient_address looks truncated")
-    if len(recipient_address) < 50:
-        raise ValueError("recipient_address is too short for a valid Bech32 address")
+    try:
+        b_address = _parse_address(recipient_address)
+    except Exception as exc:
+        raise ValueError("recipient_address is not a valid Bech32 address") from exc
     if not vault_address or not vault_address.strip():
         raise ValueError("vault_address is required")
     if not config_utxo_ref or not config_utxo_ref.strip():
@@ -322,13 +472,19 @@ def withdraw_action(
 
     # --- chain context -----------------------------------------------------
     context = _get_chain_context()
+    if b_address.network != context.network:
+        raise ValueError("recipient_address is for a different Cardano network")
 
     # --- manager wallet ----------------------------------------------------
     manager = get_manager_wallet(manager_pkh)
 
     # --- resolve config UTxO (vault state — this gets spent) ---------------
-    resolved_vault_addr = CardanoAddress.from_primitive(vault_address.strip())
+    resolved_vault_addr = _parse_address(vault_address.strip())
     tx_id, index = _parse_utxo_ref(config_utxo_ref)
+    # Tip and protocol params (cached per epoch) are fetched on the shared Blockfrost
+    # pool while we look up the UTxO
+    tip_future = blockfrost_pool.submit(_last_block_slot, context)
+    params_future = blockfrost_pool.submit(_protocol_param, context)
     config_utxo = get_utxo_by_ref(context, tx_id, index, [resolved_vault_addr])
 
     vault_coin = config_utxo.output.amount.coin
@@ -340,7 +496,7 @@ def withdraw_action(
     # --- load script from file ----------------------------------------------
     script = load_contract_script(contract_name)
 
-    b_address = CardanoAddress.from_primitive(recipient_address)
+    params_future.result()  # surface a params fetch error before building
 
     # --- submit tx ---------------------------------------------------------
     tx_hash = _build_withdraw_tx(
@@ -352,6 +508,7 @@ def withdraw_action(
         amount=amount,
         manager_signing_key=manager.signing_key,
         manager_address=manager.address,
+        validity_start=tip_future.result(),
     )
 
     logger.info("withdraw tx submitted: %s", tx_hash)
@@ -7,7 +7,7 @@ from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, RedirectResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
@@ -23,19 +23,31 @@ from app.api.endpoints import (
     web_content,
     websocket,
 )
+from app.core.blockfrost_http import setup_blockfrost_http
 from app.core.config import settings
+from app.core.logging_config import setup_logging, shutdown_logging
 from app.services import price_cache
+from app.services.vault_withdraw_action import (
+    start_chain_state_refresh,
+    stop_chain_state_refresh,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
     # Startup
+    setup_logging()
+    setup_blockfrost_http()
     if settings.TOKEN_CACHE_ENABLE_BACKGROUND_REFRESH:
         price_cache.start_background_refresh()
+    if settings.CHAIN_STATE_ENABLE_BACKGROUND_REFRESH:
+        start_chain_state_refresh()
     yield
     # Shutdown
     price_cache.stop_background_refresh()
+    stop_chain_state_refresh()
+    shutdown_logging()
 
 
 # Define the FastAPI application instance
@@ -69,14 +81,24 @@ app.add_middleware(
 # mount public static files
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 if os.path.exists(static_dir):
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    app.mount("/static", StaticFiles(directory=static_dir, html=True), name="static")
+
+
+def _existing(path: str) -> str | None:
+    return path if os.path.exists(path) else None
+
+
+# Resolved once at startup so the handler below does no filesystem calls
+FAVICON_PATH = _existing(os.path.join(static_dir, "images", "favicon.ico"))
 
 security = HTTPBasic()
+# Encoded once; compare_digest on bytes also accepts non-ASCII input
+DOC_PASSWORD_BYTES = settings.DOC_PASSWORD.encode("utf-8")
 
 
 def doc_auth(credentials: HTTPBasicCredentials = Depends(security)):
     correct_password = secrets.compare_digest(
-        credentials.password, settings.DOC_PASSWORD
+        credentials.password.encode("utf-8"), DOC_PASSWORD_BYTES
     )
     if not (correct_password):
         raise HTTPException(
@@ -99,33 +121,28 @@ async def get_redoc_documentation(username: str = Depends(doc_auth)):
 
 @app.get("/openapi.json", include_in_schema=False)
 async def openapi(username: str = Depends(doc_auth)):
-    openapi_schema = get_openapi(
-        title=app.title, version=app.version, routes=app.routes
-    )
+    # Routes are fixed once the app is built, so generate the schema only once
+    if app.openapi_schema is None:
+        openapi_schema = get_openapi(
+            title=app.title, version=app.version, routes=app.routes
+        )
 
-    # Add WebSocket route to the schema
-    openapi_schema["paths"].update(websocket.websocket_schema)
-    return openapi_schema
+        # Add WebSocket route to the schema
+        openapi_schema["paths"].update(websocket.websocket_schema)
+        app.openapi_schema = openapi_schema
+    return app.openapi_schema
 
 @app.get("/websocket-test2", include_in_schema=False)
 async def unified_websocket_test_page():
-    """Serve the unified WebSocket test HTML page"""
-    html_path = os.path.join(
-        os.path.dirname(__file__), "static", "websocket_test2.html"
-    )
-    if os.path.exists(html_path):
-        return FileResponse(html_path, media_type="text/html")
-    raise HTTPException(status_code=404, detail="Unified WebSocket test page not found")
+    """Redirect to the unified WebSocket test page served by the static mount"""
+    return RedirectResponse("/static/websocket_test2.html")
 
 
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon():
     """Serve the favicon"""
-    favicon_path = os.path.join(
-        os.path.dirname(__file__), "static", "images", "favicon.ico"
-    )
-    if os.path.exists(favicon_path):
-        return FileResponse(favicon_path, media_type="image/x-icon")
+    if FAVICON_PATH is not None:
+        return FileResponse(FAVICON_PATH, media_type="image/x-icon")
     raise HTTPException(status_code=404, detail="Favicon not found")
 
 
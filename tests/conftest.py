@@ -1,10 +1,11 @@
 import pytest
 from fastapi.testclient import TestClient
 
-from main import app
 
-
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client() -> TestClient:
-    """Create a test client for the FastAPI application."""
+    """Create one test client for the FastAPI application, shared by all tests."""
+    # Imported here so collecting tests that don't use the client skips app startup
+    from main import app
+
     return TestClient(app)
@@ -0,0 +1,6 @@
+from unittest import mock
+
+# onchain_process builds its BlockFrostChainContext at import, which calls
+# Blockfrost; import it once with the context stubbed so these tests run offline
+with mock.patch("pycardano.BlockFrostChainContext"):
+    import app.services.onchain_process  # noqa: F401
@@ -0,0 +1,71 @@
+from blockfrost.utils import Namespace
+
+from app.services.onchain_process import get_change_amount_utxo, sum_utxos_amount
+
+USER = "addr_test1user"
+POOL = "addr_test1pool"
+OTHER = "addr_test1other"
+TOKEN = "cd" * 28 + "544f4b454e"
+
+
+def _utxo(address: str, **amounts: int) -> Namespace:
+    return Namespace(
+        address=address,
+        amount=[
+            Namespace(unit=unit, quantity=str(quantity))
+            for unit, quantity in amounts.items()
+        ],
+    )
+
+
+class TestChangeAmountUtxo:
+    """Test cases for per-address UTxO change"""
+
+    def test_sum_utxos_amount(self):
+        """Test that quantities are summed per address and unit as integers"""
+        utxos = [
+            _utxo(USER, lovelace=2),
+            _utxo(USER, lovelace=3),
+            _utxo(POOL, lovelace=1),
+        ]
+
+        assert sum_utxos_amount(utxos) == {USER: {"lovelace": 5}, POOL: {"lovelace": 1}}
+        assert sum_utxos_amount(utxos, only=[POOL]) == {POOL: {"lovelace": 1}}
+
+    def test_swap_change(self):
+        """Test output minus input per address, with unchanged units dropped"""
+        inputs = [
+            _utxo(USER, lovelace=10_000_000),
+            _utxo(POOL, lovelace=50, **{TOKEN: 900}),
+        ]
+        outputs = [
+            _utxo(USER, lovelace=7_800_000, **{TOKEN: 100}),
+            _utxo(POOL, lovelace=50, **{TOKEN: 800}),
+        ]
+
+        assert get_change_amount_utxo(inputs, outputs) == {
+            USER: {"lovelace": -2_200_000, TOKEN: 100},
+            POOL: {TOKEN: -100},
+        }
+
+    def test_input_only_address(self):
+        """Test that an address spent from but not paid to gets negative change"""
+        inputs = [_utxo(USER, lovelace=5), _utxo(OTHER, lovelace=3, **{TOKEN: 1})]
+        outputs = [_utxo(USER, lovelace=5)]
+
+        assert get_change_amount_utxo(inputs, outputs) == {
+            OTHER: {"lovelace": -3, TOKEN: -1}
+        }
+
+    def test_output_only_address_and_filter(self):
+        """Test that an address only paid to is kept, and `only` limits the result"""
+        inputs = [_utxo(USER, lovelace=9)]
+        outputs = [_utxo(USER, lovelace=4), _utxo(OTHER, lovelace=5)]
+
+        assert get_change_amount_utxo(inputs, outputs) == {
+            USER: {"lovelace": -5},
+            OTHER: {"lovelace": 5},
+        }
+        assert get_change_amount_utxo(inputs, outputs, only=[OTHER]) == {
+            OTHER: {"lovelace": 5}
+        }
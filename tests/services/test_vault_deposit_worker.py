@@ -0,0 +1,153 @@
+from typing import cast
+
+import cbor2
+import pytest
+from blockfrost.utils import Namespace
+from pycardano import Address
+from pycardano.hash import VerificationKeyHash
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services import vault_deposit_worker
+from app.services.vault_deployment import VaultDeploymentInfo
+
+PAYMENT_HASH = bytes(range(28))
+STAKING_HASH = bytes(range(28, 56))
+POOL_NAME = bytes.fromhex("53656572426f745661756c74")
+SCRIPT_ADDRESS = "addr_test1wvaultscriptaddress"
+VAULT_ID = "550e8400-e29b-41d4-a716-446655440001"
+TX_ID = "ab" * 32
+
+
+def _address(payment: bytes, staking: bytes | None = None) -> str:
+    return str(
+        Address(
+            payment_part=VerificationKeyHash(payment),
+            staking_part=VerificationKeyHash(staking) if staking else None,
+            network=settings.CARDANO_NETWORK,
+        )
+    )
+
+
+def _datum_hex(user_hash: bytes, pool_name: bytes) -> str:
+    return cbor2.dumps(cbor2.CBORTag(121, [user_hash, pool_name])).hex()
+
+
+def _vault_utxos(datum_hex: str, lovelace: int = 5_000_000) -> Namespace:
+    output = Namespace(
+        address=SCRIPT_ADDRESS,
+        amount=[Namespace(unit="lovelace", quantity=str(lovelace))],
+        inline_datum=datum_hex,
+    )
+    return Namespace(outputs=[output])
+
+
+@pytest.fixture
+def deployment(monkeypatch: pytest.MonkeyPatch) -> VaultDeploymentInfo:
+    """Serve a fixed vault deployment instead of reading it from the DB."""
+    info = VaultDeploymentInfo(
+        script_address=SCRIPT_ADDRESS,
+        factory_policy_id="cd" * 28,
+        pool_name=POOL_NAME.hex(),
+        contract=None,
+        config_utxo_tx_id=None,
+        config_utxo_index=None,
+        manager_pkh=None,
+    )
+    monkeypatch.setattr(
+        vault_deposit_worker, "get_vault_deployment_info", lambda db, vault_id: info
+    )
+    return info
+
+
+def _validate(wallet_address: str, datum_hex: str):
+    tx = Namespace(fee="170000", block_time=1_700_000_000)
+    # The deployment fixture stands in for the only DB read
+    return vault_deposit_worker._validate_vault_deposit_onchain(
+        cast(Session, None),
+        TX_ID,
+        wallet_address,
+        VAULT_ID,
+        _vault_utxos(datum_hex),
+        tx,
+        1_700_000_100,
+    )
+
+
+class TestDecodeConstr:
+    """Test cases for decoding Plutus Constr datums from CBOR"""
+
+    @pytest.mark.parametrize(
+        "tag,constructor",
+        [(121, 0), (122, 1), (127, 6), (1280, 7), (1281, 8)],
+    )
+    def test_compact_tags(self, tag: int, constructor: int):
+        """Test that compact Constr tags map to their constructor index"""
+        raw = cbor2.dumps(cbor2.CBORTag(tag, [b"\x01", b"\x02"]))
+        assert vault_deposit_worker._decode_constr(raw) == (
+            constructor,
+            (b"\x01", b"\x02"),
+        )
+
+    def test_general_tag(self):
+        """Test that tag 102 carries the constructor index alongside the fields"""
+        raw = cbor2.dumps(cbor2.CBORTag(102, [200, [b"\x01"]]))
+        assert vault_deposit_worker._decode_constr(raw) == (200, (b"\x01",))
+
+    @pytest.mark.parametrize(
+        "value", [[b"\x01"], cbor2.CBORTag(24, b"\x01")], ids=["untagged", "other-tag"]
+    )
+    def test_rejects_non_constr(self, value):
+        """Test that CBOR that is not a Plutus Constr is rejected"""
+        with pytest.raises(ValueError):
+            vault_deposit_worker._decode_constr(cbor2.dumps(value))
+
+    def test_parse_datum_keeps_raw_bytes(self):
+        """Test that datum fields come back as the raw byte strings"""
+        parsed = vault_deposit_worker._parse_datum(
+            datum_hex=_datum_hex(PAYMENT_HASH, POOL_NAME)
+        )
+        assert parsed == {"constructor": 0, "fields": (PAYMENT_HASH, POOL_NAME)}
+
+
+class TestValidateVaultDepositOnchain:
+    """Test cases for checking a deposit's datum against the submitting wallet"""
+
+    def test_payment_hash_datum(self, deployment: VaultDeploymentInfo):
+        """Test a 28-byte datum hash from an enterprise wallet"""
+        wallet = _address(PAYMENT_HASH)
+        info = _validate(wallet, _datum_hex(PAYMENT_HASH, POOL_NAME))
+
+        assert info.contributor_address == wallet
+        assert info.amount == 5.0
+        assert info.fee == 0.17
+        assert info.pool_name == POOL_NAME.hex()
+        assert info.timestamp == 1_700_000_000
+
+    def test_payment_and_staking_hash_datum(self, deployment: VaultDeploymentInfo):
+        """Test a 56-byte datum hash from a base wallet"""
+        wallet = _address(PAYMENT_HASH, STAKING_HASH)
+        info = _validate(wallet, _datum_hex(PAYMENT_HASH + STAKING_HASH, POOL_NAME))
+
+        assert info.contributor_address == wallet
+
+    def test_datum_for_other_wallet_credits_datum_owner(
+        self, deployment: VaultDeploymentInfo
+    ):
+        """Test that the address in the datum, not the submitter, is credited"""
+        owner = _address(PAYMENT_HASH, STAKING_HASH)
+        submitter = _address(STAKING_HASH)
+        info = _validate(submitter, _datum_hex(PAYMENT_HASH + STAKING_HASH, POOL_NAME))
+
+        assert info.contributor_address == owner
+
+    def test_invalid_hash_length(self, deployment: VaultDeploymentInfo):
+        """Test that a datum hash of neither 28 nor 56 bytes is rejected"""
+        with pytest.raises(ValueError, match="invalid user hash"):
+            _validate(_address(PAYMENT_HASH), _datum_hex(PAYMENT_HASH[:20], POOL_NAME))
+
+    def test_pool_name_mismatch(self, deployment: VaultDeploymentInfo):
+        """Test that a datum naming another vault's pool is rejected"""
+        wallet = _address(PAYMENT_HASH)
+        with pytest.raises(ValueError, match="pool_name mismatch"):
+            _validate(wallet, _datum_hex(PAYMENT_HASH, b"OtherVault"))